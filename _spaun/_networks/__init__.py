@@ -2,6 +2,7 @@ from .workingmemory import InputGatedMemory
 from .workingmemory import InputGatedCleanupMemory
 from .workingmemory import InputGatedCleanupPlusMemory
 from .assoc_mem import AssociativeMemory
+from .assoc_mem import VectorizedAssociativeMemory
 from .routing import Selector
 from .routing import Router
 from .product_2D_ens import Product_2D_ens as Product
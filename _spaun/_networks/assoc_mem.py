@@ -6,6 +6,7 @@ import nengo
 from nengo.networks import EnsembleArray
 from nengo.dists import Choice, Exponential, Uniform
 from nengo.exceptions import ValidationError
+from nengo.solvers import LstsqL2
 from nengo.utils.compat import is_iterable, range
 from nengo.utils.network import with_self
 
@@ -115,17 +116,7 @@ class AssociativeMemory(nengo.Network):
             self.elem_utilities = nengo.Node(
                 size_in=self.n_items, label="element utilities")
 
-            self.am_ensembles = []
-            label_prefix = "" if label is None else label + "_"
-
-            for i in range(self.n_items):
-                e = nengo.Ensemble(n_neurons, 1, label=label_prefix + str(i))
-                self.am_ensembles.append(e)
-
-                # Connect input and output nodes
-                nengo.Connection(self.bias_node, e, transform=-threshold[i])
-                nengo.Connection(self.elem_input[i], e, synapse=None)
-                nengo.Connection(e, self.elem_utilities[i], synapse=None)
+            self._make_am_ensembles(n_neurons, label)
 
             if inhibitable:
                 # Input node for inhibitory gating signal (if enabled)
@@ -140,6 +131,35 @@ class AssociativeMemory(nengo.Network):
         self.add_input_mapping("input", input_vectors, input_scales)
         self.add_output_mapping("output", output_vectors)
 
+    def _make_am_ensembles(self, n_neurons, label):
+        """Creates the core associative memory ensembles (one per item).
+
+        Connects the ensembles to the bias node (shifted by the threshold),
+        the element input and the element utilities nodes.
+        """
+        self.am_ensembles = []
+        label_prefix = "" if label is None else label + "_"
+
+        for i in range(self.n_items):
+            e = nengo.Ensemble(n_neurons, 1, label=label_prefix + str(i))
+            self.am_ensembles.append(e)
+
+            # Connect input and output nodes
+            nengo.Connection(self.bias_node, e, transform=-self.thresholds[i])
+            nengo.Connection(self.elem_input[i], e, synapse=None)
+            nengo.Connection(e, self.elem_utilities[i], synapse=None)
+
+    def _connect_output_mapping(self, output, utility, output_vectors,
+                                utility_map_funcs):
+        """Connects the core ensembles to an output and its utilities node.
+        """
+        for i, am_ens in enumerate(self.am_ensembles):
+            nengo.Connection(am_ens, output, synapse=None,
+                             transform=output_vectors[i, :, None],
+                             function=utility_map_funcs[i])
+            nengo.Connection(am_ens, utility[i], synapse=None,
+                             function=utility_map_funcs[i])
+
     @staticmethod
     def linear_func(x_shift=0.0, x_scale=1.0):
         """Returns a linear mapping function.
@@ -380,12 +400,8 @@ class AssociativeMemory(nengo.Network):
         utility = nengo.Node(size_in=self.n_items, label=utility_node_name)
         setattr(self, utility_node_name, utility)
 
-        for i, am_ens in enumerate(self.am_ensembles):
-            nengo.Connection(am_ens, output, synapse=None,
-                             transform=output_vectors[i, :, None],
-                             function=utility_map_funcs[i])
-            nengo.Connection(am_ens, utility[i], synapse=None,
-                             function=utility_map_funcs[i])
+        self._connect_output_mapping(output, utility, output_vectors,
+                                     utility_map_funcs)
 
     @with_self
     def add_default_output_vector(self, output_vector, output_name='output',
@@ -595,3 +611,97 @@ class AssociativeMemory(nengo.Network):
                 nengo.Connection(default_vector_ens, cleanup_output_node,
                                  transform=default_output_vectors.T,
                                  synapse=None)
+
+
+class BlockLstsqL2(LstsqL2):
+    """Least-squares solver with L2 regularization for ensembles made of
+    independent blocks of neurons (see VectorizedAssociativeMemory).
+
+    Output dimension i is decoded from the i-th block of block_size neurons
+    only, so the decoders are block-diagonal. Each block is solved on its own
+    (with the regularization scaled by the activity of the block), as if the
+    block were a separate ensemble.
+
+    Parameters
+    ----------
+    block_size: int
+        Number of neurons in each block.
+    reg: float, optional
+        Amount of regularization, as a fraction of the neuron activity.
+    """
+    def __init__(self, block_size, reg=0.1):
+        super(BlockLstsqL2, self).__init__(weights=False, reg=reg)
+        self.block_size = block_size
+
+    def __call__(self, A, Y, rng=None, E=None):
+        if E is not None:
+            raise ValidationError("BlockLstsqL2 only solves for decoders",
+                                  attr='E', obj=self)
+        n_blocks = Y.shape[1]
+        if A.shape[1] != n_blocks * self.block_size:
+            raise ValidationError(
+                "Number of neurons (%d) does not match the number of blocks "
+                "(%d) of %d neurons" % (A.shape[1], n_blocks,
+                                        self.block_size), attr='A', obj=self)
+
+        X = np.zeros((A.shape[1], n_blocks))
+        infos = []
+        for i in range(n_blocks):
+            block = slice(i * self.block_size, (i + 1) * self.block_size)
+            X_block, info = super(BlockLstsqL2, self).__call__(
+                A[:, block], Y[:, i:i + 1], rng=rng)
+            X[block, i] = X_block[:, 0]
+            infos.append(info)
+
+        return X, {'rmses': np.hstack([info['rmses'] for info in infos]),
+                   'time': sum([info.get('time', 0) for info in infos])}
+
+
+class VectorizedAssociativeMemory(AssociativeMemory):
+    """Associative memory network built from a single core ensemble.
+
+    Functionally identical to the AssociativeMemory network, but instead of
+    creating one ensemble (and 3 + 2 * n_outputs connections) per item, the
+    core of the associative memory is a single ensemble with block-structured
+    encoders (each block of n_neurons neurons encodes one item dimension),
+    and block-diagonal decoders (each item utility is decoded from its own
+    block only, see BlockLstsqL2). The eval points of each item dimension are
+    sampled independently, so every block is solved with as many eval points
+    as an ensemble of the AssociativeMemory network.
+
+    The bias, input and utilities mappings are each made with a single
+    connection, and the output vectors are mapped from the decoded output
+    utilities (instead of being folded into the decoders), so the builder
+    and simulator operate on a few large matrices instead of many small
+    ones.
+
+    Parameters are the same as for the AssociativeMemory network.
+    """
+
+    def _make_am_ensembles(self, n_neurons, label):
+        encoders = np.repeat(np.eye(self.n_items), n_neurons, axis=0)
+
+        self.am_ens = nengo.Ensemble(
+            n_neurons * self.n_items, self.n_items, encoders=encoders,
+            label="" if label is None else label + "_ens")
+        self.am_ensembles = [self.am_ens]
+        self.am_solver = BlockLstsqL2(n_neurons)
+
+        # Connect input and output nodes
+        nengo.Connection(self.bias_node, self.am_ens,
+                         transform=-self.thresholds[:, None])
+        nengo.Connection(self.elem_input, self.am_ens, synapse=None)
+        nengo.Connection(self.am_ens, self.elem_utilities, synapse=None,
+                         solver=self.am_solver)
+
+    def _connect_output_mapping(self, output, utility, output_vectors,
+                                utility_map_funcs):
+        def utility_map_func(x, funcs=utility_map_funcs):
+            # Apply each mapping function to its own item dimension
+            return np.hstack([np.ravel(func(x[i:i + 1]))
+                              for i, func in enumerate(funcs)])
+
+        nengo.Connection(self.am_ens, utility, synapse=None,
+                         function=utility_map_func, solver=self.am_solver)
+        nengo.Connection(utility, output, synapse=None,
+                         transform=output_vectors.T)
@@ -1,8 +1,22 @@
+import numpy as np
+
 import nengo
 from nengo.networks import EnsembleArray
 from nengo.dists import Choice, Exponential
 
 
+def get_neuron_inputs(ens):
+    # Returns the list of neuron inputs of the given ensemble or network
+    if isinstance(ens, EnsembleArray):
+        if getattr(ens, 'neuron_input', None) is None:
+            ens.add_neuron_input()
+        return [ens.neuron_input]
+    elif isinstance(ens, nengo.Network):
+        return [e.neurons for e in ens.all_ensembles]
+    else:
+        return [ens.neurons]
+
+
 def make_route_connections_common(net, ens_class, num_items, gate_gain,
                                   default_sel=None, threshold_sel_in=False,
                                   **ens_args):
@@ -12,6 +26,14 @@ def make_route_connections_common(net, ens_class, num_items, gate_gain,
         net.sel_none = nengo.Ensemble(20, 1)
         nengo.Connection(bias_node, net.sel_none, synapse=None)
 
+        # All of the select signals (and the sel_none signal) are gathered
+        # into one vector, so that each element is inhibited by all of the
+        # other select signals with a single merged connection (rather than
+        # one connection per select signal).
+        net.sel_signals = nengo.Node(size_in=num_items + 1)
+        nengo.Connection(net.sel_none, net.sel_signals[num_items],
+                         synapse=None)
+
         for n in range(num_items):
             sel_node = nengo.Node(size_in=1)
             sel_in = sel_node
@@ -24,36 +46,7 @@ def make_route_connections_common(net, ens_class, num_items, gate_gain,
                                           encoders=Choice([[1]]))
                 nengo.Connection(sel_in, sel_node, synapse=None)
 
-            nengo.Connection(sel_node, net.sel_none.neurons,
-                             transform=([[-gate_gain]] *
-                                        net.sel_none.n_neurons))
-
-            if isinstance(ens, nengo.Network):
-                if n != default_sel:
-                    for e in ens.all_ensembles:
-                        nengo.Connection(
-                            net.sel_none, e.neurons,
-                            transform=[[-gate_gain]] * e.n_neurons)
-                for sn in net.sel_nodes:
-                    for e in ens.all_ensembles:
-                        nengo.Connection(
-                            sn, e.neurons,
-                            transform=[[-gate_gain]] * e.n_neurons)
-                for ee in net.ens_elements:
-                    for e in ee.all_ensembles:
-                        nengo.Connection(
-                            sel_node, e.neurons,
-                            transform=[[-gate_gain]] * e.n_neurons)
-            else:
-                if n != default_sel:
-                    nengo.Connection(net.sel_none, ens.neurons,
-                                     transform=[[-gate_gain]] * ens.n_neurons)
-                for sn in net.sel_nodes:
-                    nengo.Connection(sn, ens.neurons,
-                                     transform=[[-gate_gain]] * ens.n_neurons)
-                for ee in net.ens_elements:
-                    nengo.Connection(sel_node, ee.neurons,
-                                     transform=[[-gate_gain]] * ee.n_neurons)
+            nengo.Connection(sel_node, net.sel_signals[n], synapse=None)
 
             net.ens_elements.append(ens)
             net.sel_nodes.append(sel_node)
@@ -61,6 +54,24 @@ def make_route_connections_common(net, ens_class, num_items, gate_gain,
             setattr(net, 'sel%i' % n, sel_in)
             setattr(net, 'ens%i' % n, ens)
 
+        nengo.Connection(net.sel_signals[:num_items], net.sel_none.neurons,
+                         transform=-gate_gain *
+                         np.ones((net.sel_none.n_neurons, num_items)))
+
+        for n, ens in enumerate(net.ens_elements):
+            # Each element is inhibited by every select signal other than its
+            # own, and by sel_none (unless it is the default selection)
+            inhib_trfm = -gate_gain * np.ones((1, num_items + 1))
+            inhib_trfm[0, n] = 0
+            if n == default_sel:
+                inhib_trfm[0, num_items] = 0
+
+            for neuron_input in get_neuron_inputs(ens):
+                nengo.Connection(net.sel_signals, neuron_input,
+                                 transform=np.repeat(inhib_trfm,
+                                                     neuron_input.size_in,
+                                                     axis=0))
+
 
 class Selector(nengo.Network):
     def __init__(self, ens_class, num_items, dimensions, gate_gain=3,
@@ -15,6 +15,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
+import warnings
 import numpy as np
 
 from ..Arm import Arm
@@ -23,9 +24,18 @@ import py3LinkArm
 
 class Arm3Link(Arm):
     """A wrapper around a MapleSim generated C simulation
-    of a three link arm."""
+    of a three link arm.
 
-    def __init__(self, **kwargs):
+    adaptive bool: if True, adapt the internal simulation timestep to
+                   the arm dynamics (instead of always stepping at 1e-5)
+    adaptive_tol float: the per step state error tolerance used when
+                        adapting the timestep
+    adaptive_h_max float: the maximum internal timestep used when
+                          adapting the timestep
+    """
+
+    def __init__(self, adaptive=False, adaptive_tol=1e-6,
+                 adaptive_h_max=1e-4, **kwargs):
 
         self.DOF = 3
         Arm.__init__(self, **kwargs)
@@ -71,12 +81,32 @@ class Arm3Link(Arm):
 
         self.rest_angles = np.array([np.pi / 4.0, np.pi / 4.0, np.pi / 4.0])
 
+        # kinematics computed for the current arm state (see update_state)
+        self._kin_cache = {}
+
         # stores information returned from maplesim
         self.state = np.zeros(7)
         # maplesim arm simulation
-        self.sim = pyArm.pySim(dt=1e-5)
-        self.sim.reset(self.state)
-        self.update_state()
+        self.sim_dt = 1e-5
+        self.sim = pyArm.pySim(dt=self.sim_dt)
+        self.init_state()
+
+        self.adaptive = adaptive
+        self.adaptive_tol = adaptive_tol
+        self.adaptive_h_max = adaptive_h_max
+
+        # Compiled arm modules built before step_n was added can only be
+        # stepped one timestep at a time (from python)
+        self.has_step_n = hasattr(self.sim, 'step_n')
+        if not self.has_step_n:
+            warnings.warn('The compiled arm module (py3LinkArm) has no ' +
+                          'step_n, the arm is stepped one timestep at a ' +
+                          'time. Rebuild py3LinkArm (see README.txt).')
+        if self.adaptive and not hasattr(self.sim, 'step_adaptive'):
+            warnings.warn('The compiled arm module (py3LinkArm) has no ' +
+                          'step_adaptive, the arm is stepped with the fixed ' +
+                          'timestep. Rebuild py3LinkArm (see README.txt).')
+            self.adaptive = False
 
     def apply_torque(self, u, dt):
         """Takes in a torque and timestep and updates the
@@ -87,10 +117,36 @@ class Arm3Link(Arm):
         """
         u = -1 * np.array(u, dtype='float')
 
-        for ii in range(int(np.ceil(dt / 1e-5))):
-            self.sim.step(self.state, u)
+        if self.adaptive:
+            self.sim.step_adaptive(self.state, u, dt, self.adaptive_tol,
+                                   self.adaptive_h_max)
+        elif self.has_step_n:
+            self.sim.step_n(self.state, u, int(np.ceil(dt / self.sim_dt)))
+        else:
+            for ii in range(int(np.ceil(dt / self.sim_dt))):
+                self.sim.step(self.state, u)
         self.update_state()
 
+    def update_state(self):
+        """Called whenever the arm state changes. Clears the cached
+        kinematics so that they are recomputed (at most once) for the
+        new arm state."""
+        self._kin_cache = {}
+
+    def _get_cached(self, key, func):
+        """Returns the cached value for the current arm state, calling
+        func to compute it if it has not been computed yet.
+
+        NOTE: cached arrays are made read-only since they are shared
+              between all the callers in a timestep
+        """
+        if key not in self._kin_cache:
+            value = func()
+            for val in (value if isinstance(value, tuple) else (value,)):
+                val.flags.writeable = False
+            self._kin_cache[key] = value
+        return self._kin_cache[key]
+
     def gen_jacCOM1(self, q=None):
         """Generates the Jacobian from the COM of the first
         link to the origin frame"""
@@ -202,6 +258,9 @@ class Arm3Link(Arm):
         """Generates the Jacobian from end-effector to
         the origin frame"""
         if q is None:
+            if not use_incorrect_values:
+                return self._get_cached(
+                    'JEE', lambda: self.gen_jacEE(q=np.copy(self.q)))
             q = self.q
 
         q0 = q[0]
@@ -284,6 +343,9 @@ class Arm3Link(Arm):
 
     def gen_Mq(self, q=None, use_incorrect_values=False):
         """Generates the mass matrix of the arm in joint space"""
+        if q is None:
+            return self._get_cached(
+                'Mq', lambda: self.gen_Mq(q=np.copy(self.q)))
 
         # get the instantaneous Jacobians
         JCOM1 = self.gen_jacCOM1(q=q)
@@ -334,6 +396,16 @@ class Arm3Link(Arm):
         ee_only boolean: only return the (x,y) of the end-effector
         rotate float: how much to rotate the first joint by
         """
+        if q is None and rotate == 0.0:
+            # The kinematics of the current arm state are only computed
+            # once per timestep, no matter how many nodes read them
+            x, y = self._get_cached(
+                'position', lambda: self.position(q=np.copy(self.q)))
+            if ee_only:
+                return self._get_cached('ee_position',
+                                        lambda: np.array([x[-1], y[-1]]))
+            return (x, y)
+
         if q is None:
             q0 = self.q[0]
             q1 = self.q[1]
@@ -356,6 +428,12 @@ class Arm3Link(Arm):
             return np.array([x[-1], y[-1]])
         return (x, y)
 
+    def init_state(self):
+        """Resets the arm simulation to its initial conditions."""
+        self.state[:] = 0
+        self.sim.reset(self.state)
+        self.update_state()
+
     def reset(self, q=[], dq=[]):
         if isinstance(q, np.ndarray):
             q = q.tolist()
@@ -389,6 +467,7 @@ class Arm3Link(Arm):
     @q.setter
     def q(self, value):
         self.state[1:4] = value
+        self.update_state()
         # new_values = np.zeros(self.DOF * 2)
         # for d in range(self.DOF):
         #     new_values[d * 2] = value[d]
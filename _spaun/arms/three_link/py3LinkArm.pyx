@@ -6,6 +6,9 @@ cdef extern from "threelinkarm.cpp":
         Sim(double dt, double* params)
         void reset(double* out, double* ic)
         void step(double* out, double* u)
+        void step_n(double* out, double* u, long n)
+        long step_adaptive(double* out, double* u, double T, double tol,
+                           double h_max)
  
 cdef class pySim:
     cdef Sim* thisptr
@@ -41,3 +44,32 @@ cdef class pySim:
         param np.ndarray u: the control signal
         """
         self.thisptr.step(&out[0], &u[0])
+
+    def step_n(self, np.ndarray[double, mode="c"] out, 
+                     np.ndarray[double, mode="c"] u, long n):
+        """
+        Step the simulation forward n timesteps (with a constant
+        control signal).
+        param np.ndarray out: where to store the system output
+            NOTE: output is of form [time, output]
+        param np.ndarray u: the control signal
+        param int n: the number of timesteps to take
+        """
+        self.thisptr.step_n(&out[0], &u[0], n)
+
+    def step_adaptive(self, np.ndarray[double, mode="c"] out, 
+                            np.ndarray[double, mode="c"] u, double T,
+                            double tol=1e-6, double h_max=1e-4):
+        """
+        Step the simulation forward by T seconds (with a constant
+        control signal), adapting the internal timestep (between dt
+        and h_max) so that the per step state error stays below tol.
+        param np.ndarray out: where to store the system output
+            NOTE: output is of form [time, output]
+        param np.ndarray u: the control signal
+        param float T: the length of time to simulate
+        param float tol: the per step error tolerance
+        param float h_max: the maximum internal timestep
+        returns int: the number of Euler steps taken
+        """
+        return self.thisptr.step_adaptive(&out[0], &u[0], T, tol, h_max)
@@ -10,6 +10,7 @@
 #include <stdlib.h>
 #include <stdio.h>
 #include <math.h>
+#include <string.h>
 #include "mplshlib.h"
 static MKernelVector kv;
 EXP ALGEB M_DECL SetKernelVector(MKernelVector kv_in, ALGEB args) { kv=kv_in; return(kv->toMapleNULL()); }
@@ -449,7 +450,7 @@ class Sim {
     forward. Tautology ftw!*/
 
     double* params;
-    double dt, t0;
+    double dt, t0, h_adapt;
 	double u0[NINP], other_out[NOUT+1], y[NOUT]; 
     double w[7 + 2 * NEQ + NPAR + NDFA + NEVT];
 
@@ -459,12 +460,18 @@ class Sim {
         Sim(double dt_val, double* params_pointer);
         void reset(double* out, double* ic);
         void step(double* out, double* u);
+        void step_n(double* out, double* u, long n);
+        long step_adaptive(double* out, double* u, double T, double tol,
+                           double h_max);
+    private:
+        void write_output(double* out);
 };
 
 Sim::Sim(double dt_val, double* params_pointer)
 {
     t0 = 0.0; // set up start time
     dt = dt_val; // set time step
+    h_adapt = dt_val; // initial adaptive time step
     for (int i = 0; i < NINP; i++) u0[i] = 0.0; // initial control signal
 
     params = params_pointer; // set up parameters reference
@@ -477,6 +484,7 @@ Sim::Sim(double dt_val, double* params_pointer)
 void Sim::reset(double* out, double* ic) 
 {
 	SolverSetup(t0, ic, u0, params, y, dt, &S);
+    h_adapt = dt; // restart the adaptive time step
 
 	/* Output */
 	out[0] = t0; 
@@ -495,6 +503,95 @@ void Sim::step(double* out, double* u)
     /* Take a step with states */
     EulerStep(u, &S);
 
+    write_output(out);
+}
+
+void Sim::step_n(double* out, double* u, long n)
+/* u: control signal 
+   n: number of time steps to take */
+{
+    for (int k = 0; k < NOUT; k++)
+        out[k] = *dsn_undef; // clear values to nan 
+
+    /* Integration loop (as with n calls to step, all n steps are taken
+       after a solver error, which leaves the output cleared) */
+    for (long i = 0; i < n; i++)
+        EulerStep(u, &S);
+
+    write_output(out);
+}
+
+long Sim::step_adaptive(double* out, double* u, double T, double tol,
+                        double h_max)
+/* u: control signal 
+   T: length of time to step the simulation forward by
+   tol: maximum error (in the states) allowed per step
+   h_max: maximum time step
+   Uses step doubling to adapt the time step (between dt and h_max) to the
+   error tolerance. Returns the number of Euler steps taken. */
+{
+    double w_start[7 + 2 * NEQ + NPAR + NDFA + NEVT];
+    double w_full[7 + 2 * NEQ + NPAR + NDFA + NEVT];
+    double t_end = S.w[0] + T;
+    double h = h_adapt;  // adaptive time step (before clipping to t_end)
+    double h_step;       // time step taken
+    double err;
+    long n_steps = 0;
+
+    for (int k = 0; k < NOUT; k++)
+        out[k] = *dsn_undef; // clear values to nan 
+
+    if (h > h_max) h = h_max;
+    if (h < dt) h = dt;
+
+    /* Integration loop */
+    while (t_end - S.w[0] > 1e-12 && S.err <= 0)
+    {
+        h_step = (h > t_end - S.w[0]) ? t_end - S.w[0] : h;
+        memcpy(w_start, w, sizeof(w));
+
+        /* Take one full step */
+        S.h = h_step;
+        EulerStep(u, &S);
+        memcpy(w_full, w, sizeof(w));
+
+        /* Take two half steps from the same starting state */
+        memcpy(w, w_start, sizeof(w));
+        S.h = h_step / 2.0;
+        EulerStep(u, &S);
+        EulerStep(u, &S);
+        n_steps += 3;
+
+        err = 0.0;
+        for (long i = 1; i <= NDIFF; i++)
+            if (fabs(w[i] - w_full[i]) > err) err = fabs(w[i] - w_full[i]);
+
+        if (err <= tol || h_step <= dt)
+        {
+            /* Keep the half step result, and grow the time step if the
+               error is well within the tolerance. A step clipped to the
+               end of the interval leaves the time step unchanged (so the
+               next call does not restart from the clipped step). */
+            if (err < tol / 4.0 && h_step >= h)
+                h = (2.0 * h < h_max) ? 2.0 * h : h_max;
+        }
+        else
+        {
+            /* Reject the step and retry with a smaller time step */
+            memcpy(w, w_start, sizeof(w));
+            h = (h_step / 2.0 > dt) ? h_step / 2.0 : dt;
+        }
+    }
+
+    S.h = dt;
+    h_adapt = h;
+
+    write_output(out);
+    return n_steps;
+}
+
+void Sim::write_output(double* out)
+{
     if (S.err <= 0) 
     {
         /* Output */
@@ -0,0 +1,68 @@
+import os
+import sys
+
+
+def fork_branches(n_branches, n_workers=0):
+    """Forks a child process for every branch of a simulation.
+
+    The child processes are copies of the calling process, so every branch
+    continues from the full state of the simulation at the branching point
+    (the simulator signals, the synapse and process states held by the
+    simulator step functions, the arm and the monitor state) without
+    re-simulating the shared part of the simulation.
+
+    Returns the index of the branch in the child processes (which have to
+    end with exit_branch), and None in the calling process once all the
+    child processes have finished.
+
+    Parameters
+    ----------
+    n_branches: int
+        Number of branches.
+    n_workers: int, optional
+        Maximum number of branches to run at the same time (all branches
+        are run at the same time if <= 0).
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError('Branching a simulation requires os.fork (not ' +
+                           'available on this platform).')
+    if n_workers <= 0:
+        n_workers = n_branches
+
+    running = {}  # Child process pid -> branch index
+    failed = []
+
+    def wait_branch():
+        pid, status = os.wait()
+        ind = running.pop(pid)
+        if status != 0:
+            failed.append(ind)
+
+    for ind in range(n_branches):
+        while len(running) >= n_workers:
+            wait_branch()
+
+        # Buffered output would be written by the parent and the child
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            return ind
+        running[pid] = ind
+
+    while len(running) > 0:
+        wait_branch()
+
+    if len(failed) > 0:
+        raise RuntimeError('Simulation branch(es) %s failed.' %
+                           ', '.join(map(str, sorted(failed))))
+    return None
+
+
+def exit_branch(status=0):
+    # Ends a branch child process without returning to the code of the
+    # calling process (e.g. the remaining batch runs)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(status)
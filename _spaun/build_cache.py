@@ -0,0 +1,199 @@
+import os
+import re
+import hashlib
+import cPickle as pickle
+
+import numpy as np
+
+import nengo
+from nengo.cache import NoDecoderCache
+
+from .config import cfg
+
+
+# Configuration attributes that do not affect the built model. The stimulus
+# sequence is presented through a Node, so models that differ only in their
+# stimulus share the same built parameters.
+fingerprint_exclude_attrs = ['seed', 'rng', 'data_dir', 'probe_data_filename',
+                             'raw_seq_str', 'raw_seq', 'stim_seq',
+                             'stim_schedule',
+                             'monitor_flush_interval', 'probe_sample_every',
+                             'probe_windows', 'probe_vocab_project',
+                             'vocab_cache_dir']
+
+
+def stable_repr(value):
+    # repr that does not include memory addresses (so that it is stable
+    # across processes)
+    if isinstance(value, dict):
+        return '{%s}' % ', '.join(['%s: %s' % (stable_repr(k),
+                                               stable_repr(value[k]))
+                                   for k in sorted(value.keys())])
+    elif isinstance(value, (list, tuple)):
+        return '[%s]' % ', '.join(map(stable_repr, value))
+    elif isinstance(value, np.ndarray):
+        return hashlib.sha1(np.ascontiguousarray(value).data).hexdigest()
+
+    value_repr = repr(value)
+    if re.search(' at 0x[0-9a-fA-F]+', value_repr) and \
+       hasattr(value, '__dict__'):
+        value_repr = '%s(%s)' % (type(value).__name__,
+                                 stable_repr(value.__dict__))
+    return value_repr
+
+
+def obj_signature(obj):
+    if isinstance(obj, nengo.ensemble.Neurons):
+        return 'Neurons(%s)' % obj_signature(obj.ensemble)
+    elif isinstance(obj, nengo.base.ObjView):
+        return '%s[%s]' % (obj_signature(obj.obj), str(obj.slice))
+    return '%s(%s,%s,%s)' % (type(obj).__name__, obj.label,
+                             getattr(obj, 'size_in', ''),
+                             getattr(obj, 'size_out', ''))
+
+
+def get_network_signature(model):
+    # Structural signature of the network. Ensures that the order of the
+    # solver calls made by the builder is the same between cached runs
+    # (probes on ensembles, for example, add solver calls).
+    sig = []
+    for ens in model.all_ensembles:
+        sig.append('%s:%i' % (obj_signature(ens), ens.n_neurons))
+    for conn in model.all_connections:
+        sig.append('%s->%s:%s' % (obj_signature(conn.pre),
+                                  obj_signature(conn.post),
+                                  type(conn.solver).__name__))
+    for probe in model.all_probes:
+        sig.append('P:%s.%s' % (obj_signature(probe.target), probe.attr))
+    return '\n'.join(sig)
+
+
+def get_source_signature():
+    # Hash of the Spaun source code, so that changes to the model code
+    # invalidate the cache
+    src_hash = hashlib.sha1()
+    spaun_dir = os.path.dirname(os.path.abspath(__file__))
+    for root, dirs, files in sorted(os.walk(spaun_dir)):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith('.py'):
+                with open(os.path.join(root, filename), 'rb') as f:
+                    src_hash.update(f.read())
+    return src_hash.hexdigest()
+
+
+def get_vocab_signature(vocabs):
+    vocab_hash = hashlib.sha1()
+    for v in [vocabs.vocab, vocabs.mtr_vocab, vocabs.mtr_unk_vocab]:
+        vocab_hash.update(stable_repr(v.keys))
+        vocab_hash.update(np.ascontiguousarray(v.vectors).data)
+    return vocab_hash.hexdigest()
+
+
+def get_config_fingerprint(model):
+    fingerprint = hashlib.sha1()
+    fingerprint.update(nengo.__version__)
+    for param_name in sorted(cfg.__dict__.keys()):
+        if param_name in fingerprint_exclude_attrs:
+            continue
+        fingerprint.update('%s=%s\n' % (param_name,
+                                        stable_repr(getattr(cfg, param_name))))
+    # The network seed is used instead of cfg.seed (networks can be reused
+    # across runs with different seeds, see reset_stimulus)
+    fingerprint.update('model_seed=%s\n' % model.seed)
+    fingerprint.update(get_vocab_signature(model.vocabs))
+    fingerprint.update(get_source_signature())
+    fingerprint.update(get_network_signature(model))
+    return fingerprint.hexdigest()
+
+
+class SpaunBuildCache(NoDecoderCache):
+    """On-disk cache of the built Spaun model parameters.
+
+    The cache is keyed on a fingerprint of every Spaun configuration option,
+    the vocabularies, the seed, the Spaun source code and the network
+    structure. Because the fingerprint fully determines the model (and the
+    order in which the builder solves for decoders), the cached decoders are
+    looked up by the order of the solver calls, and a cache hit skips both the
+    neuron activity computation and the solver. The ensemble encoders, gains
+    and biases are restored onto the ensembles before the build.
+
+    Note: Ensemble eval points are regenerated by the builder (from the seed),
+          as they are cheap to sample.
+
+    Parameters
+    ----------
+    cache_dir: str
+        Directory in which to store the cache files.
+    model: nengo.Network
+        The (unbuilt) Spaun model to cache the built parameters for.
+    """
+    def __init__(self, cache_dir, model):
+        self.cache_dir = cache_dir
+        self.model = model
+        self.fingerprint = get_config_fingerprint(model)
+        self.cache_filename = os.path.join(cache_dir,
+                                           self.fingerprint + '.pkl')
+
+        self.ens_params = []
+        self.decoders = []
+        self.hit = False
+        self._solver_ind = 0
+
+    def load(self):
+        if not os.path.exists(self.cache_filename):
+            return False
+
+        with open(self.cache_filename, 'rb') as f:
+            self.ens_params, self.decoders = pickle.load(f)
+
+        for ens, (encoders, gain, bias) in zip(self.model.all_ensembles,
+                                               self.ens_params):
+            ens.encoders = encoders
+            ens.gain = gain
+            ens.bias = bias
+
+        self.hit = True
+        return True
+
+    def save(self, sim):
+        if self.hit:
+            return
+
+        self.ens_params = [(sim.data[ens].encoders, sim.data[ens].gain,
+                            sim.data[ens].bias)
+                           for ens in self.model.all_ensembles]
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        # Write to a process specific temporary file first so that
+        # concurrent runs do not write partial cache files
+        tmp_filename = '%s.%i.tmp' % (self.cache_filename, os.getpid())
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump((self.ens_params, self.decoders), f,
+                        pickle.HIGHEST_PROTOCOL)
+        if os.name == 'nt' and os.path.exists(self.cache_filename):
+            os.remove(self.cache_filename)
+        os.rename(tmp_filename, self.cache_filename)
+
+    def wrap_solver(self, solver_fn):
+        def cached_solver(*args, **kwargs):
+            ind = self._solver_ind
+            self._solver_ind += 1
+
+            if self.hit:
+                if ind < len(self.decoders):
+                    return self.decoders[ind]
+                # Stale (or partial) cache file, the remaining decoders are
+                # solved for (and the cache file is rewritten, see save)
+                self.hit = False
+
+            result = solver_fn(*args, **kwargs)
+            self.decoders.append(result)
+            return result
+        return cached_solver
+
+    def make_builder_model(self, dt, model_class=nengo.builder.Model, *args):
+        return model_class(*args, dt=dt, label='Spaun, dt=%f' % dt,
+                           decoder_cache=self)
@@ -10,6 +10,7 @@ from _spa import MemoryBlock as MB
 from _spa import SPAEnsembleArray
 from _spa.utils import get_optimal_radius
 from _networks import AssociativeMemory as AM
+from _networks import VectorizedAssociativeMemory as VecAM
 from _networks import Selector, Router, VectorNormalize
 # from arms import Arm3Link
 
@@ -22,6 +23,7 @@ class SpaunConfig(object):
         self.raw_seq_str = ''
         self.raw_seq = None
         self.stim_seq = None
+        self.stim_schedule = None
 
         self.sp_dim = 512
         self.vis_dim = 200
@@ -35,6 +37,7 @@ class SpaunConfig(object):
         self.n_neurons_cconv = 150
         self.n_neurons_mb = 50
         self.n_neurons_am = 50
+        self.am_vectorized = False
         self.max_rates = Uniform(200, 400)  # Uniform(100, 200)
         self.neuron_type = nengo.LIF()
 
@@ -76,6 +79,7 @@ class SpaunConfig(object):
         self.mtr_kv1 = np.sqrt(8)
         self.mtr_kv2 = np.sqrt(18) - self.mtr_kv1
         self.mtr_arm_type = 'three_link'
+        self.mtr_arm_args = {}  # {'adaptive': True} for three_link
         self.mtr_arm_rest_x_bias = -0.3
         self.mtr_arm_rest_y_bias = 2.5
         self.mtr_tgt_threshold = 0.075
@@ -84,6 +88,11 @@ class SpaunConfig(object):
 
         self.data_dir = ''
         self.probe_data_filename = 'probe_data.npz'
+        self.probe_sample_every = {}  # {'all': 0.01, 'mtr': None, ...}
+        self.probe_windows = []  # [(t_start, t_end), '?', 'A3', ...]
+        self.probe_vocab_project = False
+        self.monitor_flush_interval = 10.0  # Sim time between log writes
+        self.vocab_cache_dir = ''  # Vocabulary cache disabled if ''
 
     @property
     def backend(self):
@@ -164,7 +173,8 @@ class SpaunConfig(object):
         am_args['threshold'] = args.get('threshold', 0.5)
         am_args['n_neurons'] = args.get('n_neurons', self.n_neurons_am)
 
-        am_net = AM(input_vectors, output_vectors, **am_args)
+        am_class = VecAM if self.am_vectorized else AM
+        am_net = am_class(input_vectors, output_vectors, **am_args)
 
         if default_output_vector is not None:
             am_net.add_default_output_vector(default_output_vector)
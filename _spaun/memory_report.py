@@ -0,0 +1,178 @@
+import json
+import numpy as np
+
+import nengo
+from nengo.builder.signal import Signal
+
+from .utils import get_built_weights
+from .utils import get_module_obj_map, get_obj_module_name
+from .utils import spaun_module_names
+
+
+toplevel_name = 'spaun'  # Objects that do not belong to any Spaun module
+
+memory_kinds = ['encoders', 'decoders', 'transforms', 'eval_points',
+                'neuron_params', 'solver_info', 'probe_buffers', 'signals']
+
+
+def get_initial_value(sig):
+    # Signal.initial_value is Signal.value in Nengo 2.0
+    if hasattr(sig, 'initial_value'):
+        return sig.initial_value
+    return sig.value
+
+
+class MemoryReport(object):
+    """Accounts for the memory used by the arrays of a built Spaun model, by
+    Spaun module and by kind of array.
+
+    Arrays that share memory (e.g. the connection weights stored in
+    sim.model.params and the read-only simulator signal made from them) are
+    only counted once, under the first kind they are found as.
+
+    Parameters
+    ----------
+    model: nengo.Network
+        The Spaun model.
+    sim: nengo.Simulator
+        The (built) simulator.
+    """
+    def __init__(self, model, sim):
+        self.module_names = [toplevel_name] + \
+            [name for name in spaun_module_names if hasattr(model, name)]
+        self.obj_map = get_module_obj_map(model)
+
+        self.allocations = []
+        self.seen_data = set()
+
+        built_model = sim.model
+        for ens in model.all_ensembles:
+            self.add_ensemble(ens, built_model.params[ens])
+        for conn in model.all_connections:
+            self.add_connection(conn, built_model.params[conn])
+
+        probe_outputs = getattr(sim, '_probe_outputs', {})
+        for probe in model.all_probes:
+            if probe in probe_outputs:
+                self.add_probe(probe, probe_outputs[probe])
+
+        self.add_signals(built_model, getattr(sim, 'signals', None))
+
+    def add(self, obj, kind, name, array):
+        if array is None:
+            return
+        array = np.asarray(array)
+        if array.nbytes <= 0:
+            return
+
+        # Arrays are identified by the start of the memory block they view
+        root = array
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        data_ptr = root.__array_interface__['data'][0]
+        if data_ptr in self.seen_data:
+            return
+        self.seen_data.add(data_ptr)
+
+        self.allocations.append(
+            {'module': get_obj_module_name(obj, self.obj_map, toplevel_name),
+             'kind': kind, 'name': '%s.%s' % (obj, name),
+             'shape': list(root.shape), 'nbytes': int(root.nbytes)})
+
+    def add_ensemble(self, ens, built_ens):
+        self.add(ens, 'encoders', 'encoders', built_ens.encoders)
+        self.add(ens, 'encoders', 'scaled_encoders',
+                 built_ens.scaled_encoders)
+        if built_ens.eval_points is not None:
+            self.add(ens, 'eval_points', 'eval_points', built_ens.eval_points)
+        for attr in ['gain', 'bias', 'intercepts', 'max_rates']:
+            self.add(ens, 'neuron_params', attr, getattr(built_ens, attr))
+
+    def add_connection(self, conn, built_conn):
+        # Decoded connections have the transform folded into the decoders
+        decoded = (isinstance(conn.pre_obj, nengo.Ensemble) and
+                   not isinstance(conn.pre_obj.neuron_type, nengo.Direct))
+        self.add(conn, 'decoders' if decoded else 'transforms', 'weights',
+                 get_built_weights(built_conn))
+        self.add(conn, 'transforms', 'transform', built_conn.transform)
+        if built_conn.eval_points is not None:
+            self.add(conn, 'eval_points', 'eval_points',
+                     built_conn.eval_points)
+        if isinstance(built_conn.solver_info, dict):
+            for key, value in built_conn.solver_info.items():
+                if isinstance(value, np.ndarray):
+                    self.add(conn, 'solver_info', key, value)
+
+    def add_probe(self, probe, probe_output):
+        # Probe buffers are lists of (small) arrays, one per sample, so they
+        # are counted as a single allocation
+        nbytes = sum([np.asarray(x).nbytes for x in probe_output])
+        if nbytes > 0:
+            self.allocations.append(
+                {'module': get_obj_module_name(probe, self.obj_map,
+                                               toplevel_name),
+                 'kind': 'probe_buffers', 'name': str(probe),
+                 'shape': [len(probe_output)] +
+                          list(np.asarray(probe_output[0]).shape),
+                 'nbytes': int(nbytes)})
+
+    def add_signals(self, built_model, signal_arrays):
+        # Signals are attributed to the object they were built for, other
+        # (internal) signals are only found through the simulator arrays
+        for obj, obj_sigs in built_model.sig.items():
+            for name, sig in obj_sigs.items():
+                if not isinstance(sig, Signal):
+                    continue
+                base = sig.base
+                self.add(obj, 'signals', name, get_initial_value(base))
+                if signal_arrays is not None and base in signal_arrays:
+                    self.add(obj, 'signals', name, signal_arrays[base])
+
+        if signal_arrays is not None:
+            for sig in signal_arrays:
+                if isinstance(sig, Signal) and sig.base is sig:
+                    self.add(sig.name, 'signals', 'value', signal_arrays[sig])
+
+    def get_totals(self):
+        """Returns the total bytes used, by module and by kind."""
+        totals = dict([(name, dict([(kind, 0) for kind in memory_kinds]))
+                       for name in self.module_names])
+        for alloc in self.allocations:
+            totals[alloc['module']][alloc['kind']] += alloc['nbytes']
+        return totals
+
+    def get_top_allocations(self, top_n=10):
+        return sorted(self.allocations, key=lambda a: a['nbytes'],
+                      reverse=True)[:top_n]
+
+    def print_report(self, top_n=10):
+        totals = self.get_totals()
+        col_names = ['ENCODERS', 'DECODERS', 'TRANSFRMS', 'EVAL_PTS',
+                     'NEURONS', 'SOLVER', 'PROBES', 'SIGNALS', 'TOTAL']
+        row_format = '%-8s' + ' %9s' * len(col_names)
+
+        print "MEMORY USAGE (MB):"
+        print row_format % tuple(['MODULE'] + col_names)
+        for name in self.module_names + ['TOTAL']:
+            if name == 'TOTAL':
+                row = [sum([totals[module][kind] for module in totals])
+                       for kind in memory_kinds]
+            else:
+                row = [totals[name][kind] for kind in memory_kinds]
+            print row_format % tuple(
+                [name] + ['%0.2f' % (nbytes / 1024.0 ** 2)
+                          for nbytes in row + [sum(row)]])
+
+        if top_n > 0:
+            print "LARGEST %i ALLOCATIONS:" % top_n
+            for alloc in self.get_top_allocations(top_n):
+                print "  %10.2f MB  %-8s %-13s %-16s %s" % (
+                    alloc['nbytes'] / 1024.0 ** 2, alloc['module'],
+                    alloc['kind'], 'x'.join(map(str, alloc['shape'])),
+                    alloc['name'])
+
+    def write_report(self, filename, top_n=10):
+        report = {'totals': self.get_totals(),
+                  'top_allocations': self.get_top_allocations(top_n)}
+        with open(filename, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
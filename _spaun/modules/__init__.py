@@ -1,6 +1,7 @@
 from .experimenter import Stimulus
-from .experimenter import get_est_runtime
+from .experimenter import get_est_runtime, get_seq_end_time
 from .experimenter import Monitor
+from .experimenter import EarlyStop
 from .vision_system import VisionSystem as Vision
 from .production_system import ProductionSystem as ProdSys
 from .info_encoding import InfoEncoding as InfoEnc
@@ -2,13 +2,16 @@ import numpy as np
 import nengo
 
 from ...config import cfg
-from ...vocabs import vocab, item_vocab, mtr_vocab
 
 
-def Free_Recall_Network(net=None, net_label='FREE RECALL'):
+def Free_Recall_Network(vocabs, net=None, net_label='FREE RECALL'):
     if net is None:
         net = nengo.Network(label=net_label)
 
+    vocab = vocabs.vocab
+    item_vocab = vocabs.item_vocab
+    mtr_vocab = vocabs.mtr_vocab
+
     with net:
         # ----------------------- Recalled POS MB -----------------------------
         # Increase the accumulator radius to account for increased magnitude
@@ -2,13 +2,16 @@ import numpy as np
 import nengo
 
 from ...config import cfg
-from ...vocabs import item_vocab, mtr_vocab, n_num_sp
+from ...vocabs import n_num_sp
 
 
-def Serial_Recall_Network(net=None, net_label='SER RECALL'):
+def Serial_Recall_Network(vocabs, net=None, net_label='SER RECALL'):
     if net is None:
         net = nengo.Network(label=net_label)
 
+    item_vocab = vocabs.item_vocab
+    mtr_vocab = vocabs.mtr_vocab
+
     with net:
         bias_node = nengo.Node(output=1)
 
@@ -6,15 +6,17 @@ from nengo.networks import EnsembleArray
 
 from ..._networks import convert_func_2_diff_func
 from ...config import cfg
-from ...vocabs import mtr_vocab, mtr_filepath, mtr_sp_scale_factor
+from ...vocabs import mtr_filepath
 from ..vision.lif_vision import am_threshold, am_vis_sps
 from ..vision.lif_vision import max_rate as lif_vis_max_rate
 
 
-def Visual_Transform_Network(net=None, net_label='VIS TRFM'):
+def Visual_Transform_Network(vocabs, net=None, net_label='VIS TRFM'):
     if net is None:
         net = nengo.Network(label=net_label)
 
+    mtr_vocab = vocabs.mtr_vocab
+
     with net:
         # ----------------------- Inputs and Outputs --------------------------
         net.input = nengo.Node(size_in=cfg.vis_dim)
@@ -61,7 +63,7 @@ def Visual_Transform_Network(net=None, net_label='VIS TRFM'):
 
             trfm_ea = EnsembleArray(n_neurons=cfg.n_neurons_ens,
                                     n_ensembles=cfg.mtr_dim,
-                                    radius=mtr_sp_scale_factor)
+                                    radius=vocabs.mtr_sp_scale_factor)
             cfg.make_inhibitable(trfm_ea)
 
             nengo.Connection(net.input, trfm_ea.input[:mtr_path_dim],
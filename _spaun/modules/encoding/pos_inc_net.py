@@ -1,16 +1,21 @@
 import nengo
 
 from ...config import cfg
-from ...vocabs import vocab, pos_vocab
-from ...vocabs import pos_sp_strs
 
 
-def Pos_Inc_Network(net=None, net_label='POS INC', vocab=vocab,
-                    pos_vocab=pos_vocab, pos_cleanup_keys=pos_sp_strs,
+def Pos_Inc_Network(vocabs, net=None, net_label='POS INC', vocab=None,
+                    pos_vocab=None, pos_cleanup_keys=None,
                     pos_reset_key='POS1', inc_key='INC'):
     if net is None:
         net = nengo.Network(label=net_label)
 
+    if vocab is None:
+        vocab = vocabs.vocab
+    if pos_vocab is None:
+        pos_vocab = vocabs.pos_vocab
+    if pos_cleanup_keys is None:
+        pos_cleanup_keys = vocabs.pos_sp_strs
+
     with net:
         # Memory block to store POS vector
         net.pos_mb = cfg.make_mem_block(label="POS MB", vocab=pos_vocab,
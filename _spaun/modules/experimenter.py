@@ -1,4 +1,6 @@
 import os
+import re
+import shutil
 import numpy as np
 from datetime import datetime
 from warnings import warn
@@ -8,9 +10,8 @@ from nengo.spa.module import Module
 from nengo.utils.network import with_self
 
 from ..config import cfg
-from ..vocabs import vis_vocab, mtr_vocab
 from .vision import get_image as vis_get_image
-from .vision import get_image_label
+from .vision import get_image_inds, get_image_labels
 
 
 num_map = {'0': 'ZER', '1': 'ONE', '2': 'TWO', '3': 'THR', '4': 'FOR',
@@ -24,50 +25,70 @@ sym_rev_map = {}
 for key in sym_map.keys():
     sym_rev_map[sym_map[key]] = key
 
+num_strs = sorted(num_map.keys())
+
 num_out_list = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '-']
 
+# Stimulus schedule entry kinds (see StimSchedule)
+stim_wait = 0
+stim_blank = 1
+stim_sym = 2
+stim_image = 3
+
+mult_seq_tokens_re = re.compile(r'([{}:])')
+raw_seq_tokens_re = re.compile(r'N+|R+|X+|.', re.DOTALL)
+
 
 # Wrapper function for vision get_image function to pass config rng.
 def get_image(label=None):
     return vis_get_image(label, cfg.rng)
 
 
-def get_vocab(label=None):
+def get_vocab(vocabs, label=None):
     if label is None:
-        return (np.zeros(cfg.sp_dim), -1)
+        return (np.zeros(vocabs.sp_dim), -1)
     if isinstance(label, tuple):
         label = num_map[label[1]]
 
-    return (vis_vocab[str(label)].v, 0)
+    return (vocabs.vis_vocab[str(label)].v, 0)
 
 
-def insert_mtr_wait_sym(num_mtr_responses):
+def get_n_mtr_wait_syms(num_mtr_responses):
     # Add 0.5 second motor response minimum
     num_mtr_responses += 0.5
     est_mtr_response_time = num_mtr_responses * cfg.mtr_est_digit_response_time
-    extra_spaces = int(est_mtr_response_time / (cfg.present_interval * 2 **
-                                                cfg.present_blanks))
-
-    cfg.raw_seq.extend([None] * extra_spaces)
+    return int(est_mtr_response_time / (cfg.present_interval * 2 **
+                                        cfg.present_blanks))
 
 
 def parse_mult_seq(seq_str):
-    mult_open_ind = seq_str.find('{')
-    mult_close_ind = seq_str.find('}')
-    mult_value_ind = seq_str.find(':')
-
-    if mult_open_ind >= 0 and mult_close_ind >= 0 and mult_value_ind >= 0:
-        return parse_mult_seq(seq_str[:mult_open_ind] +
-                              parse_mult_seq(seq_str[mult_open_ind + 1:]))
-    elif (mult_close_ind >= 0 and mult_value_ind >= 0 and
-          mult_value_ind < mult_close_ind):
-        return (seq_str[:mult_value_ind] *
-                int(seq_str[mult_value_ind + 1:mult_close_ind]) +
-                seq_str[mult_close_ind + 1:])
-    elif mult_open_ind == mult_close_ind == mult_value_ind == -1:
-        return seq_str
-    else:
+    """Expands the multiplicative indicators ({SEQ:N} repeats SEQ N times,
+    nested indicators are expanded from the inside out) in a single pass
+    over the sequence string."""
+    groups = [[]]    # Expanded parts of each open indicator
+    counts = [None]  # Repeat count string of each open indicator
+    for token in mult_seq_tokens_re.split(seq_str):
+        if token == '{':
+            groups.append([])
+            counts.append(None)
+        elif token == ':':
+            if len(groups) <= 1 or counts[-1] is not None:
+                raise ValueError('Invalid multiplicative indicator format.')
+            counts[-1] = ''
+        elif token == '}':
+            if len(groups) <= 1 or counts[-1] is None:
+                raise ValueError('Invalid multiplicative indicator format.')
+            count = int(counts.pop())
+            group_str = ''.join(groups.pop())
+            groups[-1].append(group_str * count)
+        elif counts[-1] is not None:
+            counts[-1] += token
+        else:
+            groups[-1].append(token)
+
+    if len(groups) > 1:
         raise ValueError('Invalid multiplicative indicator format.')
+    return ''.join(groups[0])
 
 
 def parse_custom_tasks(seq_str):
@@ -109,66 +130,116 @@ def parse_custom_tasks(seq_str):
     return rslt_str + seq_str[task_close_ind + 1:]
 
 
-def parse_raw_seq():
-    raw_seq = parse_custom_tasks(parse_mult_seq(cfg.raw_seq_str))
-    hw_num = False  # Flag to indicate to use a hand written number
-    fixed_num = False
-
-    prev_c = ''
-    fixed_c = ''
+def expand_raw_seq(seq_str):
+    """Expands the random digits (N - distinct random digits, R - random
+    digits, lowercase letters - random digits that are fixed for each task)
+    and the motor responses (X - replaced by the motor response wait
+    symbols) of the sequence string. Returns the raw stimulus sequence (see
+    cfg.raw_seq).
+
+    The random digits are drawn in batches once the whole sequence has been
+    scanned (runs of N, R and X are scanned as a single token)."""
+    raw_seq = []
+    n_runs = []    # (raw_seq position, length) of each run of N's
+    r_inds = []    # raw_seq positions of the R's
+    var_inds = []  # raw_seq positions of the task variables
+    var_keys = []  # Value map index of each task variable
     value_maps = {}
+    n_vars = 0
 
     num_n = 0
     num_r = 0
+    num_mtr_responses = 0
 
-    cfg.raw_seq = []
-    cfg.stim_seq = []
-
-    num_mtr_responses = 0.0
+    for token in raw_seq_tokens_re.findall(seq_str):
+        c = token[0]
 
-    for c in raw_seq:
+        # Note: A run of N's is only terminated by a character other than N
+        #       (and a run of R's by a character other than N or R)
         if c == 'N':
-            num_n += 1
+            num_n += len(token)
             continue
-        else:
-            cs = np.random.choice(num_map.keys(), num_n, replace=False)
-            for n in cs:
-                cfg.raw_seq.append(n)
+        elif num_n > 0:
+            if num_n > len(num_map):
+                raise ValueError('Too many distinct random digits (N) in ' +
+                                 'a row.')
+            n_runs.append((len(raw_seq), num_n))
+            raw_seq.extend(['N'] * num_n)
             num_n = 0
 
         if c == 'R':
-            num_r += 1
+            num_r += len(token)
             continue
-        else:
-            cs = np.random.choice(num_map.keys(), num_r, replace=True)
-            for r in cs:
-                cfg.raw_seq.append(r)
+        elif num_r > 0:
+            r_inds.extend(range(len(raw_seq), len(raw_seq) + num_r))
+            raw_seq.extend(['R'] * num_r)
             num_r = 0
 
         if c == 'A':    # Clear the value maps for each task
             value_maps = {}
-            num_n = 0
-            num_r = 0
-
-        if c.islower():
-            if c not in value_maps:
-                value_maps[c] = np.random.choice(num_map.keys(), 1,
-                                                 replace=True)[0]
-            c = value_maps[c]
 
         if c == 'X':
-            num_mtr_responses += 1
+            num_mtr_responses += len(token)
             continue
         elif num_mtr_responses > 0:
-            insert_mtr_wait_sym(num_mtr_responses)
+            raw_seq.extend([None] * get_n_mtr_wait_syms(num_mtr_responses))
             num_mtr_responses = 0
 
-        cfg.raw_seq.append(c)
+        if c.islower():
+            if c not in value_maps:
+                value_maps[c] = n_vars
+                n_vars += 1
+            var_inds.append(len(raw_seq))
+            var_keys.append(value_maps[c])
+
+        raw_seq.append(c)
 
     # Insert trailing motor response wait symbols
-    insert_mtr_wait_sym(num_mtr_responses)
+    raw_seq.extend([None] * get_n_mtr_wait_syms(num_mtr_responses))
+
+    # Draw the random digits
+    raw_seq = np.array(raw_seq, dtype=object)
+    digits = np.array(num_strs, dtype=object)
+    if len(n_runs) > 0:
+        # Distinct digits: the start of a random permutation for each run
+        perms = np.argsort(np.random.random((len(n_runs), len(digits))),
+                           axis=1)
+        n_inds = np.concatenate([np.arange(pos, pos + n)
+                                 for pos, n in n_runs])
+        n_perm_inds = np.concatenate([perms[i, :n]
+                                      for i, (_, n) in enumerate(n_runs)])
+        raw_seq[n_inds] = digits[n_perm_inds]
+    if len(r_inds) > 0:
+        raw_seq[r_inds] = digits[np.random.randint(len(digits),
+                                                   size=len(r_inds))]
+    if len(var_inds) > 0:
+        var_digits = np.random.randint(len(digits), size=n_vars)
+        raw_seq[var_inds] = digits[var_digits[var_keys]]
+
+    return raw_seq.tolist()
+
+
+def compile_stim_seq(raw_seq, n_mtr_responses=0, n_pad_waits=0):
+    """Compiles the raw stimulus sequence (see cfg.raw_seq) into a
+    StimSchedule (with the given number of expected motor responses, and
+    of wait entries that pad the end of the sequence).
+
+    The handwritten digit (#) image indices and the labels of the fixed
+    index (<IND>) images are resolved in batches once the whole sequence
+    has been scanned."""
+    hw_num = False  # Flag to indicate to use a hand written number
+    fixed_num = False
 
-    for c in cfg.raw_seq:
+    prev_c = ''
+    fixed_c = ''
+
+    kinds = []
+    labels = []
+    image_inds = []
+    hw_inds = []     # Schedule indices of the handwritten digits
+    fixed_inds = []  # Schedule indices of the fixed index images
+
+    for c in raw_seq:
         if c == '#':
             hw_num = True
             continue
@@ -194,50 +265,266 @@ def parse_raw_seq():
         # If previous character is identical to current character, insert a
         # space between them.
         if c is not None and prev_c == c and not cfg.present_blanks:
-            cfg.stim_seq.append('.')
+            kinds.append(stim_blank)
+            labels.append('.')
+            image_inds.append(-1)
 
         if c is not None and c.isdigit() and hw_num:
-            img_ind = get_image(c)[1]
-            cfg.stim_seq.append((img_ind, c))
-            c = img_ind
+            hw_inds.append(len(kinds))
+            kinds.append(stim_image)
+            labels.append(c)
+            image_inds.append(-1)
+            c = None  # Never identical to the next character
             hw_num = False
         elif c is not None and c == '>' and fixed_num:
-            cfg.stim_seq.append((int(fixed_c),
-                                 str(get_image_label(int(fixed_c)))))
+            fixed_inds.append(len(kinds))
+            kinds.append(stim_image)
+            labels.append(None)
+            image_inds.append(int(fixed_c))
             fixed_num = False
+        elif c is None:
+            kinds.append(stim_wait)
+            labels.append(None)
+            image_inds.append(-1)
         else:
-            cfg.stim_seq.append(c)
+            kinds.append(stim_blank if c == '.' else stim_sym)
+            labels.append(c)
+            image_inds.append(-1)
 
         prev_c = c
 
+    image_inds = np.array(image_inds, dtype=int)
+    if len(hw_inds) > 0:
+        image_inds[hw_inds] = get_image_inds([labels[i] for i in hw_inds],
+                                             cfg.rng)
+    if len(fixed_inds) > 0:
+        for i, label in zip(fixed_inds,
+                            get_image_labels(image_inds[fixed_inds])):
+            labels[i] = str(label)
 
-def stim_func(t, stim_seq=None, get_func=None):
-    ind = t / cfg.present_interval / (2 ** cfg.present_blanks)
+    return StimSchedule(kinds, labels, image_inds, n_mtr_responses,
+                        n_pad_waits)
 
-    if (cfg.present_blanks and int(ind) != int(round(ind))) or \
-       int(ind) >= len(stim_seq) or stim_seq[int(ind)] == '.':
-        image_data = get_func()
-    else:
-        image_data = get_func(stim_seq[int(ind)])
 
-    return image_data[0]
+def compile_seq_str(seq_str):
+    """Compiles a stimulus sequence string. Returns the raw stimulus
+    sequence and the StimSchedule."""
+    seq_str = parse_custom_tasks(parse_mult_seq(seq_str))
+    raw_seq = expand_raw_seq(seq_str)
 
+    # The motor response wait symbols inserted at the end of a sequence that
+    # does not end with a motor response only pad the sequence
+    n_pad_waits = 0 if seq_str.endswith('X') else get_n_mtr_wait_syms(0)
+    return raw_seq, compile_stim_seq(raw_seq, seq_str.count('X'),
+                                     n_pad_waits)
 
-def stim_func_vis(t):
-    return stim_func(t, cfg.stim_seq, get_image)
 
-
-def stim_func_vocab(t):
-    return stim_func(t, cfg.stim_seq, get_vocab)
+def parse_raw_seq():
+    """Compiles the raw stimulus sequence string (cfg.raw_seq_str) into the
+    stimulus schedule (cfg.stim_schedule). The raw stimulus sequence
+    (cfg.raw_seq, used by the MPI backend) and the stimulus sequence
+    (cfg.stim_seq, stored with the probe data) are also set."""
+    cfg.raw_seq, cfg.stim_schedule = compile_seq_str(cfg.raw_seq_str)
+    cfg.stim_seq = cfg.stim_schedule.to_stim_seq()
+
+
+def append_raw_seq(seq_str):
+    """Appends the stimulus sequence string to the current stimulus (e.g.
+    to continue a simulation of the current stimulus with another task).
+    Only the appended sequence is compiled, so the random digits of the
+    current stimulus schedule are not redrawn. The appended sequence
+    replaces the waits that pad the end of the current sequence (see
+    get_seq_end_time)."""
+    raw_seq, schedule = compile_seq_str(seq_str)
+    cfg.raw_seq_str += seq_str
+    cfg.raw_seq = (cfg.raw_seq[:len(cfg.raw_seq) -
+                               cfg.stim_schedule.n_pad_waits] + raw_seq)
+    cfg.stim_schedule = cfg.stim_schedule.append(schedule)
+    cfg.stim_seq = cfg.stim_schedule.to_stim_seq()
+
+
+class StimSchedule(object):
+    """Compiled stimulus sequence, with one entry per presentation interval.
+
+    Parameters
+    ----------
+    kinds: list
+        Kind of each entry: stim_wait (nothing is presented, e.g. while
+        waiting for a motor response), stim_blank, stim_sym (a visual
+        semantic pointer, presented as a random image of it), or
+        stim_image (a specific image).
+    labels: list
+        Label of each entry (the visual semantic pointer of stim_sym
+        entries, and the digit of stim_image entries). The labels are
+        stored as indices into the list of distinct labels.
+    image_inds: array_like
+        Image index of each entry (-1 for entries that are not stim_image
+        entries).
+    n_mtr_responses: int, optional
+        Number of motor responses (X) expected from Spaun.
+    n_pad_waits: int, optional
+        Number of stim_wait entries at the end of the schedule that only pad
+        the end of the sequence (and are not waiting for a motor response).
+    """
+    def __init__(self, kinds, labels, image_inds, n_mtr_responses=0,
+                 n_pad_waits=0):
+        self.kinds = np.array(kinds, dtype=np.int8)
+        self.n_mtr_responses = n_mtr_responses
+        self.n_pad_waits = n_pad_waits
+        self.image_inds = np.array(image_inds, dtype=np.int32)
+
+        self.labels = []
+        label_map = {}
+        self.label_inds = np.empty(len(labels), dtype=np.int32)
+        for i, label in enumerate(labels):
+            if label not in label_map:
+                label_map[label] = len(self.labels)
+                self.labels.append(label)
+            self.label_inds[i] = label_map[label]
+
+    def __len__(self):
+        return self.kinds.size
+
+    def __repr__(self):
+        return 'StimSchedule(%i entries)' % len(self)
+
+    def append(self, other):
+        """Returns the schedule with the entries of the other schedule
+        appended to the entries of this schedule (the entries that pad the
+        end of this schedule are dropped)."""
+        n = len(self) - self.n_pad_waits
+        labels = ([self.labels[ind] for ind in self.label_inds[:n]] +
+                  [other.labels[ind] for ind in other.label_inds])
+        return StimSchedule(np.concatenate([self.kinds[:n], other.kinds]),
+                            labels,
+                            np.concatenate([self.image_inds[:n],
+                                            other.image_inds]),
+                            self.n_mtr_responses + other.n_mtr_responses,
+                            other.n_pad_waits)
+
+    def to_stim_seq(self):
+        """Returns the stimulus sequence as a list (see cfg.stim_seq): None
+        for stim_wait entries, '.' for blanks, the semantic pointer string
+        for stim_sym entries, and an (image index, label) tuple for
+        stim_image entries."""
+        stim_seq = []
+        for kind, label_ind, image_ind in zip(self.kinds, self.label_inds,
+                                              self.image_inds):
+            if kind == stim_wait:
+                stim_seq.append(None)
+            elif kind == stim_blank:
+                stim_seq.append('.')
+            elif kind == stim_sym:
+                stim_seq.append(self.labels[label_ind])
+            else:
+                stim_seq.append((int(image_ind), self.labels[label_ind]))
+        return stim_seq
+
+
+class StimulusFunc(object):
+    """Precompiled stimulus presentation function.
+
+    Compiles the stimulus sequence once into a dense array of stimulus data
+    (one row per presentation, with an additional blank row) and an index
+    schedule (one entry per presentation interval), so that evaluating the
+    stimulus at time t is a single array lookup.
+
+    Parameters
+    ----------
+    stim_seq: list
+        The processed stimulus sequence (see cfg.stim_seq).
+    get_func: function
+        Function that maps an entry of the stimulus sequence to a
+        (data, index) tuple. Called with no arguments to get the blank
+        stimulus.
+    """
+    def __init__(self, stim_seq, get_func):
+        self.get_func = get_func
+        self.set_stim_seq(stim_seq)
+
+    def set_stim_seq(self, stim_seq):
+        blank_data = self.get_func()[0]
+        blank_ind = len(stim_seq)
+
+        self.stim_data = np.empty((len(stim_seq) + 1, blank_data.size))
+        self.stim_data[blank_ind] = blank_data
+        for i, stim in enumerate(stim_seq):
+            if stim == '.':
+                self.stim_data[i] = blank_data
+            else:
+                self.stim_data[i] = self.get_func(stim)[0]
+
+        # Schedule of stimulus data indices for each presentation interval.
+        # When blanks are presented, every other interval is blank. The
+        # trailing blank entry is used for all times past the end of the
+        # stimulus sequence.
+        schedule = np.arange(len(stim_seq) + 1)
+        if cfg.present_blanks:
+            schedule = np.repeat(schedule, 2)
+            schedule[1::2] = blank_ind
+        self.schedule = schedule
+        self.interval = cfg.present_interval
+
+    def __call__(self, t):
+        ind = min(int(t / self.interval), self.schedule.size - 1)
+        return self.stim_data[self.schedule[ind]]
 
 
 def get_est_runtime():
-    return len(cfg.stim_seq) * cfg.present_interval * (2 ** cfg.present_blanks)
+    return (len(cfg.stim_schedule) * cfg.present_interval *
+            (2 ** cfg.present_blanks))
+
+
+def get_stim_end_time():
+    """Returns the time at which the last stimulus presentation ends (the
+    motor response wait symbols at the end of the sequence are not
+    presentations)."""
+    presented_inds = np.flatnonzero(cfg.stim_schedule.kinds != stim_wait)
+    n_presented = presented_inds[-1] + 1 if presented_inds.size > 0 else 0
+    return n_presented * cfg.present_interval * (2 ** cfg.present_blanks)
+
+
+def get_seq_end_time():
+    """Returns the time at which the stimulus sequence ends, without the
+    waits that pad the end of the sequence (i.e. the time at which a
+    sequence appended with append_raw_seq starts)."""
+    return ((len(cfg.stim_schedule) - cfg.stim_schedule.n_pad_waits) *
+            cfg.present_interval * (2 ** cfg.present_blanks))
+
+
+def get_stim_windows(pattern):
+    """Returns the (t_start, t_end) time windows for the given stimulus
+    pattern. A window starts at each presentation of the pattern (e.g. 'A3'
+    for the start of every A3 task, or '?' for the start of every response
+    phase), and ends at the start of the next task (or lasts until the end
+    of the simulation). Blanks are ignored when matching the pattern."""
+    schedule = cfg.stim_schedule
+    label_chars = [num_rev_map.get(label, sym_rev_map.get(label, str(label)))
+                   for label in schedule.labels]
+
+    stim_inds = np.flatnonzero((schedule.kinds == stim_sym) |
+                               (schedule.kinds == stim_image))
+    stim_str = ''.join([label_chars[label_ind]
+                        for label_ind in schedule.label_inds[stim_inds]])
+
+    interval = cfg.present_interval * (2 ** cfg.present_blanks)
+
+    windows = []
+    ind = stim_str.find(pattern)
+    while ind >= 0:
+        next_task_ind = stim_str.find('A', ind + 1)
+        t_end = (stim_inds[next_task_ind] * interval
+                 if next_task_ind >= 0 else np.inf)
+        windows.append((stim_inds[ind] * interval, t_end))
+        ind = stim_str.find(pattern, ind + 1)
+    return windows
 
 
 class Stimulus(Module):
-    def __init__(self, label="Stimulus", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Stimulus", seed=None,
+                 add_to_container=None):
         super(Stimulus, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
@@ -251,16 +538,27 @@ class Stimulus(Module):
                                         cfg.present_interval,
                                         cfg.present_blanks)
         else:
-            self.output = nengo.Node(output=stim_func_vis,
+            self.stim_func = StimulusFunc(cfg.stim_seq, get_image)
+            self.output = nengo.Node(output=self.stim_func,
                                      label='Stim Module Out')
 
         # Define vocabulary inputs and outputs
-        self.outputs = dict(default=(self.output, vis_vocab))
+        self.outputs = dict(default=(self.output, self.vocabs.vis_vocab))
+
+    def set_stim_seq(self, stim_seq):
+        # Swaps the presented stimulus sequence (also in built simulators,
+        # as the node output is evaluated from the stim_func data)
+        if cfg.use_mpi:
+            raise RuntimeError('Swapping the stimulus sequence is not ' +
+                               'supported with the MPI backend.')
+        self.stim_func.set_stim_seq(stim_seq)
 
 
 class StimulusDummy(Module):
-    def __init__(self, label="Stimulus", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Stimulus", seed=None,
+                 add_to_container=None):
         super(StimulusDummy, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
@@ -269,7 +567,7 @@ class StimulusDummy(Module):
         self.output = nengo.Node(output=np.random.uniform(size=dimension))
 
         # Define vocabulary inputs and outputs
-        self.outputs = dict(default=(self.output, vis_vocab))
+        self.outputs = dict(default=(self.output, self.vocabs.vis_vocab))
 
 
 def monitor_func(t, x, monitor, stim_seq=None):
@@ -301,7 +599,6 @@ def monitor_func(t, x, monitor, stim_seq=None):
             monitor.write_to_file('_')
             # print ' ', eff_ind, monitor.prev_ind
         monitor.prev_ind = eff_ind
-        monitor.data_obj.flush()
 
     # Determine what has been written
     write_inds = x[:-2]
@@ -318,54 +615,97 @@ def monitor_func(t, x, monitor, stim_seq=None):
         if mtr_ramp > monitor.mtr_write_min and not monitor.mtr_written:
             monitor.write_to_file(write_out)
             monitor.mtr_written = True
-            monitor.data_obj.flush()
+            monitor.n_responses += 1
         elif mtr_ramp < monitor.mtr_reset_max:
             monitor.mtr_written = False
 
+    if (cfg.monitor_flush_interval > 0 and
+       t - monitor.prev_flush_t >= cfg.monitor_flush_interval):
+        monitor.flush()
+        monitor.prev_flush_t = t
+
 
 class MonitorData(object):
+    """Experiment monitor log data.
+
+    Everything written to the log is buffered in memory (so that the
+    monitor does not write to disk inside the simulation step). The buffer
+    is written to the log file every cfg.monitor_flush_interval seconds of
+    simulation time (if > 0), and when the log is closed.
+    """
     def __init__(self):
         self.data_filename = \
             os.path.join(cfg.data_dir,
                          cfg.probe_data_filename[:-4] + '_log.txt')
         self.data_obj = open(self.data_filename, 'a')
+        self.data_buffer = []
 
         self.prev_ind = -1
+        self.prev_flush_t = 0.0
         self.mtr_written = False
+        self.n_responses = 0
         self.mtr_write_min = 0.75
         self.mtr_reset_max = 0.25
         self.null_output = "_"
 
         self.write_header()
+        self.flush()
 
     def write_header(self):
-        self.data_obj.write('# Spaun Simulation Properties:\n')
-        self.data_obj.write('# - Run datetime: %s\n' % datetime.now())
-        self.data_obj.write('# Spaun Configuration Options:\n')
-        self.data_obj.write('# ----------------------------\n')
+        self.write_to_file('# Spaun Simulation Properties:\n')
+        self.write_to_file('# - Run datetime: %s\n' % datetime.now())
+        self.write_to_file('# Spaun Configuration Options:\n')
+        self.write_to_file('# ----------------------------\n')
         for param_name in sorted(cfg.__dict__.keys()):
             if not callable(getattr(cfg, param_name)):
-                self.data_obj.write('# - %s = %s\n' %
-                                    (param_name, getattr(cfg, param_name)))
-        self.data_obj.write('# ----------------------------\n')
+                self.write_to_file('# - %s = %s\n' %
+                                   (param_name, getattr(cfg, param_name)))
+        self.write_to_file('# ----------------------------\n')
 
     def write_to_file(self, str):
+        self.data_buffer.append(str)
+
+        # Data written after the log has been closed is not buffered
+        if self.data_obj.closed:
+            self.flush()
+
+    def flush(self):
+        if len(self.data_buffer) <= 0:
+            return
+
         orig_closed_state = self.data_obj.closed
         if orig_closed_state:
             self.data_obj = open(self.data_filename, 'a')
 
-        self.data_obj.write(str)
+        self.data_obj.write(''.join(self.data_buffer))
+        self.data_obj.flush()
+        self.data_buffer = []
 
         if orig_closed_state:
             self.data_obj.close()
 
     def close_data_obj(self):
+        self.flush()
         self.data_obj.close()
 
+    def branch(self):
+        """Continues the log in a new log file (for the current
+        cfg.probe_data_filename) that starts with the log written so far."""
+        self.close_data_obj()
+        data_filename = \
+            os.path.join(cfg.data_dir,
+                         cfg.probe_data_filename[:-4] + '_log.txt')
+        if data_filename != self.data_filename:
+            shutil.copyfile(self.data_filename, data_filename)
+            self.data_filename = data_filename
+        self.data_obj = open(self.data_filename, 'a')
+
 
 class Monitor(Module):
-    def __init__(self, label="Monitor", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Monitor", seed=None,
+                 add_to_container=None):
         super(Monitor, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.monitor_data = MonitorData()
         self.init_module()
 
@@ -376,11 +716,11 @@ class Monitor(Module):
         else:
             self.output = \
                 nengo.Node(output=self.monitor_node_func,
-                           size_in=len(mtr_vocab.keys) + 3,
+                           size_in=len(self.vocabs.mtr_vocab.keys) + 3,
                            label='Experiment monitor')
 
         # Define vocabulary inputs and outputs
-        self.outputs = dict(default=(self.output, vis_vocab))
+        self.outputs = dict(default=(self.output, self.vocabs.vis_vocab))
 
     def monitor_node_func(self, t, x):
         return monitor_func(t, x, self.monitor_data, cfg.stim_seq)
@@ -402,5 +742,45 @@ class Monitor(Module):
         else:
             warn("Monitor Module - Cannot connect from 'mtr'")
 
+    def reset(self):
+        # Starts a new log (for the current cfg.probe_data_filename) for a
+        # new run of the same network
+        self.monitor_data.close_data_obj()
+        self.monitor_data = MonitorData()
+
+    def branch(self):
+        # Continues the log in a new file (for the current
+        # cfg.probe_data_filename) for a branch of a simulation
+        self.monitor_data.branch()
+
     def close(self):
         self.monitor_data.close_data_obj()
+
+
+class EarlyStop(object):
+    """Ends a simulation once Spaun has written all the expected motor
+    responses (see StimSchedule.n_mtr_responses), and all the stimuli have
+    been presented, plus a grace period (so that the last response can be
+    finished).
+
+    Parameters
+    ----------
+    monitor: Monitor
+        The experiment monitor (that counts the written responses).
+    grace_time: float, optional
+        Simulation time to keep running for once all the responses have
+        been written.
+    """
+    def __init__(self, monitor, grace_time=0.5):
+        self.monitor = monitor
+        self.grace_time = grace_time
+        self.n_expected = cfg.stim_schedule.n_mtr_responses
+        self.t_stim_end = get_stim_end_time()
+        self.t_responded = None
+
+    def done(self, t):
+        if self.t_responded is None and t >= self.t_stim_end and \
+           self.monitor.monitor_data.n_responses >= self.n_expected:
+            self.t_responded = t
+        return (self.t_responded is not None and
+                t >= self.t_responded + self.grace_time)
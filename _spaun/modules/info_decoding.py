@@ -6,24 +6,26 @@ from nengo.spa.module import Module
 from nengo.utils.network import with_self
 
 from ..config import cfg
-from ..vocabs import item_vocab, mtr_vocab, mtr_unk_vocab
-from ..vocabs import dec_out_sr_sp_vecs, dec_out_copy_draw_sp_vecs
-from ..vocabs import dec_out_fr_sp_vecs
-from ..vocabs import dec_pos_gate_dec_sp_vecs, dec_pos_gate_task_sp_vecs
 from ..vocabs import pos_mb_rst_sp_inds
-from ..vocabs import mtr_sp_scale_factor
 
 from .decoding import Serial_Recall_Network, Free_Recall_Network
 from .decoding import Visual_Transform_Network, Output_Classification_Network
 
 
 class InfoDecoding(Module):
-    def __init__(self, label="Info Dec", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Info Dec", seed=None,
+                 add_to_container=None):
         super(InfoDecoding, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
     def init_module(self):
+        item_vocab = self.vocabs.item_vocab
+        mtr_vocab = self.vocabs.mtr_vocab
+        mtr_unk_vocab = self.vocabs.mtr_unk_vocab
+        mtr_sp_scale_factor = self.vocabs.mtr_sp_scale_factor
+
         bias_node = nengo.Node(output=1)
 
         # ---------------------- Inputs and outputs ------------------------- #
@@ -51,7 +53,7 @@ class InfoDecoding(Module):
         nengo.Connection(bias_node, self.pos_mb_gate_bias.input, transform=-1)
 
         # -------------------- Serial decoding network ---------------------- #
-        serial_decode = Serial_Recall_Network()
+        serial_decode = Serial_Recall_Network(self.vocabs)
         nengo.Connection(self.items_input, serial_decode.items_input,
                          transform=cfg.dcconv_item_in_scale, synapse=None)
         nengo.Connection(self.pos_input, serial_decode.pos_input,
@@ -62,7 +64,7 @@ class InfoDecoding(Module):
                          serial_decode.inhibit, synapse=0.01)
 
         # ---------------- Free recall decoding network --------------------- #
-        free_recall_decode = Free_Recall_Network()
+        free_recall_decode = Free_Recall_Network(self.vocabs)
         nengo.Connection(self.items_input, free_recall_decode.items_input,
                          transform=cfg.dec_fr_item_in_scale, synapse=None)
         nengo.Connection(self.pos_input, free_recall_decode.pos_input,
@@ -92,7 +94,7 @@ class InfoDecoding(Module):
 
         # ------------- Visual transform decoding network ------------------- #
         if cfg.vis_dim > 0:
-            vis_trfm_decode = Visual_Transform_Network()
+            vis_trfm_decode = Visual_Transform_Network(self.vocabs)
         else:
             from .decoding.vis_trfm_net import Dummy_Visual_Transform_Network
             vis_trfm_decode = \
@@ -232,6 +234,12 @@ class InfoDecoding(Module):
     def setup_connections(self, parent_net):
         p_net = parent_net
 
+        dec_out_sr_sp_vecs = self.vocabs.dec_out_sr_sp_vecs
+        dec_out_copy_draw_sp_vecs = self.vocabs.dec_out_copy_draw_sp_vecs
+        dec_out_fr_sp_vecs = self.vocabs.dec_out_fr_sp_vecs
+        dec_pos_gate_dec_sp_vecs = self.vocabs.dec_pos_gate_dec_sp_vecs
+        dec_pos_gate_task_sp_vecs = self.vocabs.dec_pos_gate_task_sp_vecs
+
         # Set up connections from vision module
         if hasattr(parent_net, 'vis'):
             vis_am_utils = p_net.vis.am_utilities
@@ -5,7 +5,6 @@ from nengo.spa.module import Module
 from nengo.utils.network import with_self
 
 from ..config import cfg
-from ..vocabs import vocab, pos_vocab, pos_sp_strs
 from ..vocabs import pos_mb_gate_sp_inds
 from ..vocabs import pos_mb_rst_sp_inds, pos_mb_acc_rst_sp_inds
 
@@ -13,13 +12,15 @@ from .encoding import Pos_Inc_Network
 
 
 class InfoEncoding(Module):
-    def __init__(self, label="Info Enc", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Info Enc", seed=None,
+                 add_to_container=None):
         super(InfoEncoding, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
     def init_module(self):
-        self.pos_inc = Pos_Inc_Network()
+        self.pos_inc = Pos_Inc_Network(self.vocabs)
 
         # POS x ITEM
         self.item_cconv = cfg.make_cir_conv()
@@ -34,7 +35,7 @@ class InfoEncoding(Module):
 
         # Memory block to store accumulated POS vectors (POSi-1 + POSi)
         self.pos_mb_acc = cfg.make_mem_block(label="POS MB ACC",
-                                             vocab=pos_vocab,
+                                             vocab=self.vocabs.pos_vocab,
                                              reset_key=0,
                                              radius=acc_radius,
                                              n_neurons=100)  # ,
@@ -50,8 +51,8 @@ class InfoEncoding(Module):
         self.enc_output = self.item_cconv.output
 
         # Define module inputs and outputs
-        self.inputs = dict(default=(self.item_input, vocab))
-        self.outputs = dict(default=(self.pos_output, vocab))
+        self.inputs = dict(default=(self.item_input, self.vocabs.vocab))
+        self.outputs = dict(default=(self.pos_output, self.vocabs.vocab))
 
     def setup_connections(self, parent_net):
         # Set up connections from vision module
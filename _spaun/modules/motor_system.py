@@ -9,14 +9,14 @@ from nengo.utils.network import with_self
 
 from .._networks import DifferenceFunctionEvaluator as DiffFuncEvaltr
 from ..config import cfg
-from ..vocabs import mtr_init_task_sp_vecs, mtr_bypass_task_sp_vecs
-from ..vocabs import mtr_sp_scale_factor
 from .motor import OSController, Ramp_Signal_Network
 
 
 class MotorSystem(Module):
-    def __init__(self, label="Motor Sys", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Motor Sys", seed=None,
+                 add_to_container=None):
         super(MotorSystem, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
@@ -63,7 +63,8 @@ class MotorSystem(Module):
 
         # --------------- FUNCTION REPLICATOR SYSTEM --------------
         mtr_func_dim = cfg.mtr_dim // 2
-        func_eval_net = DiffFuncEvaltr(mtr_func_dim, mtr_sp_scale_factor, 2)
+        func_eval_net = DiffFuncEvaltr(mtr_func_dim,
+                                       self.vocabs.mtr_sp_scale_factor, 2)
         func_eval_net.make_inhibitable(-5)
 
         nengo.Connection(self.ramp_sig.ramp, func_eval_net.func_input)
@@ -77,7 +78,9 @@ class MotorSystem(Module):
                          func_eval_net.diff_func_pts[1])
 
         # --------------- MOTOR ARM CONTROL -----------------
-        arm_obj = cfg.mtr_arm_class()
+        arm_obj = cfg.mtr_arm_class(**cfg.mtr_arm_args)
+        self.arm_obj = arm_obj
+        self.osc_obj = None
 
         if arm_obj is not None:
             arm_rest_coord = np.array(arm_obj.position(q=arm_obj.rest_angles,
@@ -92,6 +95,9 @@ class MotorSystem(Module):
                                    kv=cfg.mtr_kv1, kv2=cfg.mtr_kv2,
                                    init_target=arm_rest_coord)
 
+            self.osc_obj = osc_obj
+            self.arm_rest_coord = arm_rest_coord
+
             # Make the osc control
             osc_net = osc_obj.initialize_model()
 
@@ -205,7 +211,19 @@ class MotorSystem(Module):
         self.ramp_reset_hold = self.ramp_sig.reset_hold
         self.ramp_50_75 = self.ramp_sig.ramp_50_75
 
+    def reset_arm(self):
+        # Resets the arm (and controller) state for a new run of the same
+        # network
+        if self.arm_obj is not None:
+            self.arm_obj.init_state()
+        if self.osc_obj is not None:
+            self.osc_obj.u = np.zeros((2, 1))
+            self.osc_obj.target = self.arm_rest_coord
+
     def setup_connections(self, parent_net):
+        mtr_init_task_sp_vecs = self.vocabs.mtr_init_task_sp_vecs
+        mtr_bypass_task_sp_vecs = self.vocabs.mtr_bypass_task_sp_vecs
+
         # Set up connections from production system module
         if hasattr(parent_net, 'ps'):
             # Motor init signal generation - generates a pulse when ps.task
@@ -5,7 +5,6 @@ from nengo.spa.module import Module
 from nengo.utils.network import with_self
 
 from ..config import cfg
-from ..vocabs import ps_task_vocab, ps_state_vocab, ps_dec_vocab
 from ..vocabs import ps_task_mb_gate_sp_inds, ps_task_mb_rst_sp_inds
 from ..vocabs import ps_task_init_vis_sp_inds, ps_task_init_task_sp_inds
 from ..vocabs import ps_state_mb_gate_sp_inds, ps_state_mb_rst_sp_inds
@@ -13,12 +12,18 @@ from ..vocabs import ps_dec_mb_gate_sp_inds, ps_dec_mb_rst_sp_inds
 
 
 class ProductionSystem(Module):
-    def __init__(self, label="Prod Sys", seed=None, add_to_container=None):
+    def __init__(self, vocabs, label="Prod Sys", seed=None,
+                 add_to_container=None):
         super(ProductionSystem, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
     def init_module(self):
+        ps_task_vocab = self.vocabs.ps_task_vocab
+        ps_state_vocab = self.vocabs.ps_state_vocab
+        ps_dec_vocab = self.vocabs.ps_dec_vocab
+
         # Memory block to hold task information
         if cfg.ps_use_am_mb:
             self.ps_task_mb = \
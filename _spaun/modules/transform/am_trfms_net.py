@@ -1,13 +1,17 @@
 import nengo
 
 from ...config import cfg
-from ...vocabs import item_vocab, pos_vocab, pos1_vocab
 
 
-def Assoc_Mem_Transforms_Network(net=None, net_label='AM TRANSFORMS'):
+def Assoc_Mem_Transforms_Network(vocabs, net=None,
+                                 net_label='AM TRANSFORMS'):
     if net is None:
         net = nengo.Network(label=net_label)
 
+    item_vocab = vocabs.item_vocab
+    pos_vocab = vocabs.pos_vocab
+    pos1_vocab = vocabs.pos1_vocab
+
     with net:
         # ----------------------- Inputs and Outputs --------------------------
         # NOTE: Additional nodes here for future implementation of selectable
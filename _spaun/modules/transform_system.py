@@ -8,17 +8,20 @@ from nengo.utils.network import with_self
 from .._spa import Compare
 from ..config import cfg
 from ..utils import strs_to_inds, invol_matrix
-from ..vocabs import vocab, ps_state_sp_strs, ps_dec_sp_strs
+from ..vocabs import ps_state_sp_strs, ps_dec_sp_strs
 from .transform import Assoc_Mem_Transforms_Network
 
 
 class TransformationSystem(Module):
-    def __init__(self):
+    def __init__(self, vocabs):
         super(TransformationSystem, self).__init__()
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
     def init_module(self):
+        vocab = self.vocabs.vocab
+
         # ----- Input and output selectors ----- #
         self.select_in_a = cfg.make_selector(3)
         self.select_in_b = cfg.make_selector(6, represent_identity=True)
@@ -70,7 +73,7 @@ class TransformationSystem(Module):
         nengo.Connection(self.cconv1.output, self.select_out.input4)
 
         # ----- Assoc memory transforms (for QA task) -----
-        self.am_trfms = Assoc_Mem_Transforms_Network()
+        self.am_trfms = Assoc_Mem_Transforms_Network(self.vocabs)
 
         nengo.Connection(self.frm_mb1, self.am_trfms.frm_mb1, synapse=None)
         nengo.Connection(self.frm_mb2, self.am_trfms.frm_mb2, synapse=None)
@@ -263,12 +266,14 @@ class TransformationSystem(Module):
 
 
 class TransformationSystemDummy(TransformationSystem):
-    def __init__(self):
-        super(TransformationSystemDummy, self).__init__()
+    def __init__(self, vocabs):
+        super(TransformationSystemDummy, self).__init__(vocabs)
         self.init_module()
 
     @with_self
     def init_module(self):
+        vocab = self.vocabs.vocab
+
         self.select_in_a = cfg.make_selector(2, n_ensembles=1,
                                              ens_dimensions=cfg.sp_dim,
                                              n_neurons=cfg.sp_dim)
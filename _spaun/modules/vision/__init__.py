@@ -3,4 +3,6 @@ from .utils import mnist
 from .utils import load_image_data
 from .utils import normalize as normalize_images
 from .utils import get_image
+from .utils import get_image_inds
 from .utils import get_image_label
+from .utils import get_image_labels
@@ -1,11 +1,9 @@
 import os
 import numpy as np
-import bisect as bs
 
 import nengo
 
-from .utils import mnist
-from .utils import load_image_data
+from .utils import load_image_store
 
 vision_filepath = os.path.join('_spaun', 'modules', 'vision')
 
@@ -43,32 +41,29 @@ am_num_classes = weights_class.shape[1]
 vis_sps_scale = 4.5
 # For magic number 4.5, see reference_code/vision_2/data_analysis.py
 
-# --- Mnist data ---
-_, _, [images_data, images_labels] = mnist(filepath=vision_filepath)
-images_labels = map(str, images_labels)
-
-# --- Spaun symbol data ---
-_, _, [symbol_data, symbol_labels] = load_image_data('spaun_sym.pkl.gz',
-                                                     filepath=vision_filepath)
-
 # --- Combined image (mnist + spaun symbol) data ---
-images_data = np.append(images_data, symbol_data, axis=0)
-images_labels = np.append(images_labels, symbol_labels, axis=0)
-
-sorted_labels = np.argsort(images_labels)
-images_data = images_data[sorted_labels]
-images_labels = images_labels[sorted_labels]
-
-images_data_mean = images_data.mean(axis=0, keepdims=True)
-images_data_std = 1.0 / np.maximum(images_data.std(axis=0, keepdims=True),
-                                   3e-1)
-
-images_data_dimensions = images_data[0].shape[0]
+#     (memory-mapped from the image store, see make_image_store)
+images_data, images_labels, images_info = \
+    load_image_store(os.path.join(vision_filepath, 'image_store'),
+                     vision_filepath)
+
+images_data_mean = images_info['images_data_mean']
+images_data_std = 1.0 / np.maximum(images_info['images_data_std'], 3e-1)
+
+images_data_dimensions = images_data.shape[1]
+images_labels_unique = images_info['images_labels_unique']
+images_labels_start = images_info['images_labels_start']
+images_labels_end = images_info['images_labels_end']
 images_labels_inds = []
-images_labels_unique = np.unique(images_labels)
-for lbl in images_labels_unique:
-    images_labels_inds.append(range(bs.bisect_left(images_labels, lbl),
-                                    bs.bisect_right(images_labels, lbl)))
+for start, end in zip(images_labels_start, images_labels_end):
+    images_labels_inds.append(range(start, end))
+
+# Lookup tables from label string to label index, and from image index to
+# label index
+images_labels_map = dict(zip(images_labels_unique,
+                             range(len(images_labels_unique))))
+images_labels_dense = np.repeat(np.arange(len(images_labels_unique)),
+                                images_labels_end - images_labels_start)
 
 
 def LIFVision(net=None, net_neuron_type=None):
@@ -32,6 +32,135 @@ def load_image_data(filename, filepath=''):
     return train, valid, test
 
 
+image_store_files = ['images_data.npy', 'images_labels.npy',
+                     'images_info.npz']
+image_source_files = ['mnist.pkl.gz', 'spaun_sym.pkl.gz']
+
+
+def get_image_source_stamp(vision_filepath=''):
+    """Size and modification time of the image source files ('' if any of
+    them is missing). Stored with the image store to detect stale stores."""
+    import os
+
+    stamp = []
+    for filename in image_source_files:
+        filename = os.path.join(vision_filepath, filename)
+        if not os.path.exists(filename):
+            return ''
+        file_stat = os.stat(filename)
+        stamp.append('%s:%i:%0.3f' % (os.path.basename(filename),
+                                      file_stat.st_size, file_stat.st_mtime))
+    return ';'.join(stamp)
+
+
+def make_image_store(store_path, vision_filepath=''):
+    """Convert the vision image data into an uncompressed image store.
+
+    The mnist test images and the spaun symbols are combined, sorted by label
+    and saved as .npy files that can be memory-mapped, together with the
+    label index ranges, the image mean and standard deviation, and the stamp
+    of the image source files (see get_image_source_stamp).
+    """
+    import os
+    import shutil
+
+    # --- Mnist data ---
+    _, _, [images_data, images_labels] = mnist(filepath=vision_filepath)
+    images_labels = map(str, images_labels)
+
+    # --- Spaun symbol data ---
+    _, _, [symbol_data, symbol_labels] = \
+        load_image_data('spaun_sym.pkl.gz', filepath=vision_filepath)
+
+    source_stamp = get_image_source_stamp(vision_filepath)
+
+    # --- Combined image (mnist + spaun symbol) data ---
+    images_data = np.append(images_data, symbol_data, axis=0)
+    images_labels = np.append(images_labels, symbol_labels, axis=0)
+
+    sorted_labels = np.argsort(images_labels)
+    images_data = images_data[sorted_labels]
+    images_labels = images_labels[sorted_labels]
+
+    images_labels_unique = np.unique(images_labels)
+    images_labels_start = np.searchsorted(images_labels, images_labels_unique,
+                                          side='left')
+    images_labels_end = np.searchsorted(images_labels, images_labels_unique,
+                                        side='right')
+
+    # Write the store to a process specific temporary directory first, and
+    # move the whole directory into place once complete (so that concurrent
+    # processes never load a partial store)
+    tmp_path = '%s.%i.tmp' % (store_path, os.getpid())
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, image_store_files[0]), images_data)
+    np.save(os.path.join(tmp_path, image_store_files[1]), images_labels)
+    np.savez(os.path.join(tmp_path, image_store_files[2]),
+             images_data_mean=images_data.mean(axis=0, keepdims=True),
+             images_data_std=images_data.std(axis=0, keepdims=True),
+             images_labels_unique=images_labels_unique,
+             images_labels_start=images_labels_start,
+             images_labels_end=images_labels_end,
+             images_source_stamp=source_stamp)
+
+    # Move a stale store out of the way (memory-mapped files of the stale
+    # store stay valid for the processes that still have them open)
+    old_path = '%s.%i.old' % (store_path, os.getpid())
+    try:
+        os.rename(store_path, old_path)
+    except OSError:
+        pass
+    try:
+        os.rename(tmp_path, store_path)
+    except OSError:
+        # Another process moved its store into place first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def get_image_store_stamp(store_path):
+    """Image source file stamp the image store was made from (None if there
+    is no complete image store)."""
+    import os
+
+    if not all([os.path.exists(os.path.join(store_path, filename))
+                for filename in image_store_files]):
+        return None
+    images_info = np.load(os.path.join(store_path, image_store_files[2]))
+    try:
+        if 'images_source_stamp' not in images_info.files:
+            return None
+        return str(images_info['images_source_stamp'])
+    finally:
+        images_info.close()
+
+
+def load_image_store(store_path, vision_filepath=''):
+    """Load the image store (creating it if it does not exist, or if the image
+    source files have changed since it was made).
+
+    The image data is memory-mapped read-only, so that all Spaun processes
+    share the same pages.
+    """
+    import os
+
+    source_stamp = get_image_source_stamp(vision_filepath)
+    if source_stamp == '' or \
+       get_image_store_stamp(store_path) != source_stamp:
+        make_image_store(store_path, vision_filepath)
+
+    images_data = np.load(os.path.join(store_path, image_store_files[0]),
+                          mmap_mode='r')
+    images_labels = np.load(os.path.join(store_path, image_store_files[1]),
+                            mmap_mode='r')
+    images_info = dict(np.load(os.path.join(store_path,
+                                            image_store_files[2])))
+    return images_data, images_labels, images_info
+
+
 def normalize(images):
     """Normalize a set of images"""
     images -= images.mean(axis=0, keepdims=True)
@@ -74,17 +203,71 @@ def get_image(label=None, rng=None):
         return (np.zeros(vision_net.images_data_dimensions), -1)
     else:
         # All other cases (usually label is a str)
-        label_ind = np.where(vision_net.images_labels_unique == label)
-        if label_ind[0].shape[0] > 0:
-            image_ind = rng.choice(
-                vision_net.images_labels_inds[label_ind[0][0]])
+        label_ind = vision_net.images_labels_map.get(label)
+        if label_ind is not None:
+            start = vision_net.images_labels_start[label_ind]
+            end = vision_net.images_labels_end[label_ind]
+            image_ind = int(start + rng.choice(end - start))
         else:
             image_ind = rng.choice(len(vision_net.images_labels_inds))
         return (vision_net.images_data[image_ind], image_ind)
 
 
+def get_image_inds(labels, rng=None):
+    """Batched version of get_image that returns only the image indices.
+
+    Resolves a whole list of labels (image index numbers, label strings,
+    tuples or None) to image indices at once. Blank images are given an index
+    of -1.
+    """
+    if rng is None:
+        rng = np.random.RandomState()
+
+    labels = [label[0] if isinstance(label, tuple) else label
+              for label in labels]
+    image_inds = np.empty(len(labels), dtype=int)
+
+    # Per label: label index for label strings (-1 if unknown, -2 for image
+    # index numbers and -3 for blanks)
+    label_inds = np.array([-2 if isinstance(label, (int, np.integer)) else
+                           -3 if label is None else
+                           vision_net.images_labels_map.get(label, -1)
+                           for label in labels], dtype=int)
+
+    ind_mask = label_inds == -2
+    image_inds[ind_mask] = [label for label, is_ind in zip(labels, ind_mask)
+                            if is_ind]
+    image_inds[label_inds == -3] = -1
+
+    # One draw per label string (in label order), matching the draws made by
+    # get_image (rng.choice(n) draws rng.randint(n)). Unknown labels draw
+    # from all of the images.
+    draw_mask = label_inds >= -1
+    draw_label_inds = label_inds[draw_mask]
+    known = draw_label_inds >= 0
+    starts = np.where(
+        known,
+        vision_net.images_labels_start[np.maximum(draw_label_inds, 0)], 0)
+    ends = np.where(
+        known, vision_net.images_labels_end[np.maximum(draw_label_inds, 0)],
+        len(vision_net.images_labels_inds))
+    image_inds[draw_mask] = \
+        starts + np.array([rng.randint(n) for n in ends - starts], dtype=int)
+
+    return image_inds
+
+
 def get_image_label(index):
-    for label, indicies in enumerate(vision_net.images_labels_inds):
-        if index in indicies:
-            return label
+    if 0 <= index < len(vision_net.images_labels_dense):
+        return int(vision_net.images_labels_dense[index])
     return -1
+
+
+def get_image_labels(indices):
+    """Batched version of get_image_label."""
+    indices = np.asarray(indices, dtype=int)
+    valid = (indices >= 0) & (indices < len(vision_net.images_labels_dense))
+    return np.where(valid,
+                    vision_net.images_labels_dense[np.where(valid, indices,
+                                                            0)],
+                    -1)
@@ -1,4 +1,5 @@
 from warnings import warn
+from functools import partial
 
 import nengo
 from nengo.spa import Vocabulary
@@ -9,9 +10,8 @@ from .._networks import DetectChange
 from .._spa import MemoryBlock as MB
 
 from ..config import cfg
-from ..vocabs import vocab, vis_vocab
 from ..vocabs import item_mb_gate_sp_inds
-from .experimenter import stim_func_vocab
+from .experimenter import StimulusFunc, get_vocab
 from .vision.lif_vision import LIFVision as LIFVisionNet
 from .vision.lif_vision import vis_sps_scale as lif_vis_sps_scale
 from .vision.lif_vision import am_vis_sps, am_threshold, amp
@@ -19,11 +19,12 @@ from .vision.lif_vision import images_data_dimensions
 
 
 class VisionSystem(Module):
-    def __init__(self, label="Vision Sys", seed=None, add_to_container=None,
-                 vis_net=None, detect_net=None,
+    def __init__(self, vocabs, label="Vision Sys", seed=None,
+                 add_to_container=None, vis_net=None, detect_net=None,
                  vis_sps=am_vis_sps, vis_sps_scale=lif_vis_sps_scale,
                  vis_net_neuron_type=None):
         super(VisionSystem, self).__init__(label, seed, add_to_container)
+        self.vocabs = vocabs
         self.init_module(vis_net, detect_net, vis_sps, vis_sps_scale,
                          vis_net_neuron_type)
 
@@ -45,7 +46,7 @@ class VisionSystem(Module):
 
         # Make associative memory to map visual image semantic pointers to
         # visual conceptual semantic pointers
-        self.am = cfg.make_assoc_mem(vis_sps, vis_vocab.vectors,
+        self.am = cfg.make_assoc_mem(vis_sps, self.vocabs.vis_vocab.vectors,
                                      threshold=am_threshold,
                                      inhibitable=True)
         nengo.Connection(self.vis_net.output, self.am.input, synapse=0.005)
@@ -77,7 +78,7 @@ class VisionSystem(Module):
         self.neg_attention = self.detect_change_net.output
 
         # Define module inputs and outputs
-        self.outputs = dict(default=(self.output, vocab))
+        self.outputs = dict(default=(self.output, self.vocabs.vocab))
 
         # Probing
         self.vis_out = self.vis_net.output
@@ -91,15 +92,16 @@ class VisionSystem(Module):
 
 
 class VisionSystemDummy(VisionSystem):
-    def __init__(self, label="Dummy Vision Sys", seed=None,
+    def __init__(self, vocabs, label="Dummy Vision Sys", seed=None,
                  add_to_container=None,
                  vis_net=None, detect_net=None,
                  vis_sps=None, vis_sps_scale=None,
                  vis_net_neuron_type=None, **args):
-        super(VisionSystemDummy, self).__init__(label, seed, add_to_container,
-                                                self.dummy_lif_vis_net(),
+        super(VisionSystemDummy, self).__init__(vocabs, label, seed,
+                                                add_to_container,
+                                                self.dummy_lif_vis_net(vocabs),
                                                 self.dummy_detect_net(),
-                                                vis_vocab.vectors,
+                                                vocabs.vis_vocab.vectors,
                                                 cfg.get_optimal_sp_radius(),
                                                 **args)
 
@@ -107,11 +109,13 @@ class VisionSystemDummy(VisionSystem):
         # system
         cfg.vis_dim = -cfg.sp_dim
 
-    def dummy_lif_vis_net(self):
+    def dummy_lif_vis_net(self, vocabs):
         with nengo.Network(label="Dummy LIF Vision") as net:
             net.input = nengo.Node(size_in=images_data_dimensions,
                                    label='Input')
-            net.output = nengo.Node(output=stim_func_vocab,
+            net.output = nengo.Node(output=StimulusFunc(
+                                        cfg.stim_seq,
+                                        partial(get_vocab, vocabs)),
                                     label='Dummy LIF Vision Out')
             net.raw_output = net.output
         return net
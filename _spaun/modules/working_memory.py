@@ -7,7 +7,7 @@ from nengo.utils.network import with_self
 
 from ..config import cfg
 from ..utils import strs_to_inds
-from ..vocabs import vocab, ps_state_sp_strs, ps_task_sp_strs, ps_dec_sp_strs
+from ..vocabs import ps_state_sp_strs, ps_task_sp_strs, ps_dec_sp_strs
 from ..vocabs import item_mb_gate_sp_inds, item_mb_rst_sp_inds
 from ..vocabs import ave_mb_gate_sp_inds, ave_mb_rst_sp_inds
 
@@ -15,12 +15,15 @@ from .memory import WM_Generic_Network, WM_Averaging_Network
 
 
 class WorkingMemory(Module):
-    def __init__(self):
+    def __init__(self, vocabs):
         super(WorkingMemory, self).__init__()
+        self.vocabs = vocabs
         self.init_module()
 
     @with_self
     def init_module(self):
+        vocab = self.vocabs.vocab
+
         # Memory input node
         self.mem_in = nengo.Node(size_in=cfg.sp_dim, label='WM Module In Node')
 
@@ -295,12 +298,14 @@ class WorkingMemory(Module):
 
 
 class WorkingMemoryDummy(WorkingMemory):
-    def __init__(self):
-        super(WorkingMemoryDummy, self).__init__()
+    def __init__(self, vocabs):
+        super(WorkingMemoryDummy, self).__init__(vocabs)
         self.init_module()
 
     @with_self
     def init_module(self):
+        vocab = self.vocabs.vocab
+
         # Memory input node
         self.mem_in = nengo.Node(size_in=cfg.sp_dim, label='WM Module In Node')
 
@@ -0,0 +1,275 @@
+import json
+import numpy as np
+
+import nengo
+
+from .utils import spaun_module_names
+
+
+class PartitionUnit(object):
+    """A group of Spaun objects that are always placed on the same
+    partition.
+
+    Parameters
+    ----------
+    key: str
+        Unique (and deterministic) key of the unit in the Spaun model.
+    module_name: str
+        Spaun module that the unit belongs to.
+    objs: list
+        Nengo objects (networks, ensembles and nodes) in the unit.
+    pinned: bool
+        Whether the unit has to be placed on partition 0 (nengo_mpi runs
+        python function nodes on the master process).
+    """
+    def __init__(self, key, module_name, objs, pinned=False):
+        self.key = key
+        self.module_name = module_name
+        self.objs = objs
+        self.pinned = pinned
+
+        self.n_neurons = 0
+        for obj in objs:
+            if isinstance(obj, nengo.Network):
+                self.n_neurons += sum([e.n_neurons for e in obj.all_ensembles])
+            elif isinstance(obj, nengo.Ensemble):
+                self.n_neurons += obj.n_neurons
+
+    def all_objs(self):
+        result = []
+        for obj in self.objs:
+            result.append(obj)
+            if isinstance(obj, nengo.Network):
+                result.extend(obj.all_ensembles + obj.all_nodes +
+                              obj.all_networks)
+        return result
+
+
+def is_python_node(node):
+    return callable(node.output) or isinstance(node.output, nengo.Process)
+
+
+def get_network_units(net, key, module_name, max_unit_neurons):
+    # Networks larger than max_unit_neurons are split into their child
+    # networks (recursively), and the objects directly in the network
+    nodes = [n for n in net.nodes if not is_python_node(n)]
+    units = [PartitionUnit('%s.node%i' % (key, i), module_name, [n], True)
+             for i, n in enumerate(net.nodes) if is_python_node(n)]
+
+    n_neurons = sum([e.n_neurons for e in net.all_ensembles])
+    if n_neurons <= max_unit_neurons and len(units) == 0 and \
+       not any([is_python_node(n) for n in net.all_nodes]):
+        return [PartitionUnit(key, module_name, [net])]
+
+    if len(net.ensembles) > 0 or len(nodes) > 0:
+        units.append(PartitionUnit(key + '.own', module_name,
+                                   net.ensembles + nodes))
+    for i, subnet in enumerate(net.networks):
+        units.extend(get_network_units(subnet, '%s.%i' % (key, i),
+                                       module_name, max_unit_neurons))
+    return units
+
+
+def get_obj_key(obj):
+    if isinstance(obj, nengo.base.ObjView):
+        obj = obj.obj
+    if isinstance(obj, nengo.ensemble.Neurons):
+        obj = obj.ensemble
+    return id(obj)
+
+
+class SpaunPartitioner(object):
+    """Module-aware partitioner for the nengo_mpi backend.
+
+    The Spaun model is split into units (the Spaun modules, and their
+    sub-networks if a module is too large to fit on one partition). The
+    units are laid out along the Spaun module order (which follows the
+    information flow: vis -> ps/enc -> mem -> trfm -> dec -> mtr), filling
+    one partition after the other up to the mean partition load, and the
+    layout is then refined by greedily moving units to the partitions of
+    their neighbours while this reduces the cost. The cost weighs the load
+    imbalance (max load / mean load) against the cross-partition traffic
+    (the dimensionality of the cut connections).
+
+    Parameters
+    ----------
+    model: nengo.Network
+        The Spaun model.
+    n_parts: int
+        Number of partitions.
+    imbalance_weight: float, optional
+        Weight of the load imbalance term in the cost (the traffic term is
+        normalized by the total connection traffic).
+    max_iters: int, optional
+        Maximum number of refinement passes.
+    """
+    def __init__(self, model, n_parts, imbalance_weight=1.0, max_iters=50):
+        self.model = model
+        self.n_parts = n_parts
+        self.imbalance_weight = imbalance_weight
+        self.max_iters = max_iters
+
+        total_neurons = sum([e.n_neurons for e in model.all_ensembles])
+        max_unit_neurons = max(total_neurons / float(n_parts), 1)
+
+        # ----- Partition units -----
+        self.units = []
+        module_objs = set()
+        for name in spaun_module_names:
+            if hasattr(model, name):
+                module = getattr(model, name)
+                module_objs.add(id(module))
+                self.units.extend(get_network_units(module, name, name,
+                                                    max_unit_neurons))
+
+        # Objects that do not belong to any Spaun module
+        toplevel = ([net for net in model.networks
+                     if id(net) not in module_objs] +
+                    model.ensembles + model.nodes)
+        for i, obj in enumerate(toplevel):
+            pinned = isinstance(obj, nengo.Node) and is_python_node(obj)
+            self.units.append(PartitionUnit('spaun.%i' % i, 'spaun', [obj],
+                                            pinned))
+
+        self.unit_map = {}
+        for ind, unit in enumerate(self.units):
+            for obj in unit.all_objs():
+                self.unit_map.setdefault(id(obj), ind)
+
+        # ----- Unit graph (edge weights are the connection dimensions) -----
+        self.edges = {}
+        self.n_conns = {}
+        for conn in model.all_connections:
+            pre = self.unit_map.get(get_obj_key(conn.pre_obj), None)
+            post = self.unit_map.get(get_obj_key(conn.post_obj), None)
+            if pre is None or post is None or pre == post:
+                continue
+            edge = (min(pre, post), max(pre, post))
+            self.edges[edge] = self.edges.get(edge, 0) + conn.size_mid
+            self.n_conns[edge] = self.n_conns.get(edge, 0) + 1
+
+        self.neighbours = [{} for _ in self.units]
+        for (pre, post), w in self.edges.items():
+            self.neighbours[pre][post] = w
+            self.neighbours[post][pre] = w
+
+        self.loads = np.array([unit.n_neurons for unit in self.units],
+                              dtype=float)
+        self.total_traffic = max(sum(self.edges.values()), 1)
+
+    def partition(self):
+        """Returns the partition index of every unit."""
+        target_load = self.loads.sum() / self.n_parts
+
+        # Initial layout: fill the partitions along the module order
+        parts = np.zeros(len(self.units), dtype=int)
+        part = 0
+        part_load = 0.0
+        for ind, unit in enumerate(self.units):
+            if unit.pinned:
+                continue
+            if part_load >= target_load and part < self.n_parts - 1:
+                part += 1
+                part_load = 0.0
+            parts[ind] = part
+            part_load += self.loads[ind]
+
+        # Refinement: greedy unit moves to neighbouring partitions
+        part_loads = np.bincount(parts, weights=self.loads,
+                                 minlength=self.n_parts)
+        cut_traffic = self.get_cut_traffic(parts)
+        cost = self.get_cost(part_loads, cut_traffic)
+        for _ in range(self.max_iters):
+            improved = False
+            for ind, unit in enumerate(self.units):
+                if unit.pinned:
+                    continue
+                neighbours = self.neighbours[ind]
+                for new_part in set([parts[n] for n in neighbours]):
+                    old_part = parts[ind]
+                    if new_part == old_part:
+                        continue
+
+                    # Change in the cut traffic if the unit is moved
+                    d_traffic = sum([w * (int(parts[n] != new_part) -
+                                          int(parts[n] != old_part))
+                                     for n, w in neighbours.items()])
+                    part_loads[old_part] -= self.loads[ind]
+                    part_loads[new_part] += self.loads[ind]
+                    new_cost = self.get_cost(part_loads,
+                                             cut_traffic + d_traffic)
+                    if new_cost < cost - 1e-9:
+                        parts[ind] = new_part
+                        cut_traffic += d_traffic
+                        cost = new_cost
+                        improved = True
+                    else:
+                        part_loads[new_part] -= self.loads[ind]
+                        part_loads[old_part] += self.loads[ind]
+            if not improved:
+                break
+        return parts
+
+    def get_cut_traffic(self, parts):
+        return sum([w for (pre, post), w in self.edges.items()
+                    if parts[pre] != parts[post]])
+
+    def get_cost(self, part_loads, cut_traffic):
+        imbalance = part_loads.max() / max(part_loads.mean(), 1)
+        return (self.imbalance_weight * imbalance +
+                cut_traffic / float(self.total_traffic))
+
+    def get_assignments(self, parts):
+        """Returns the nengo_mpi assignments (object -> partition index)."""
+        assignments = {}
+        for unit, part in zip(self.units, parts):
+            for obj in unit.objs:
+                assignments[obj] = int(part)
+        return assignments
+
+    def evaluate(self, parts):
+        """Cost model of a partition: the load of each partition, the load
+        imbalance, and the cross-partition traffic (in values sent per
+        timestep)."""
+        part_loads = np.bincount(parts, weights=self.loads,
+                                 minlength=self.n_parts)
+
+        traffic = {}
+        n_cut_conns = 0
+        for (pre, post), w in self.edges.items():
+            if parts[pre] != parts[post]:
+                pair = '%i-%i' % tuple(sorted([parts[pre], parts[post]]))
+                traffic[pair] = traffic.get(pair, 0) + w
+                n_cut_conns += self.n_conns[(pre, post)]
+
+        return {'n_parts': self.n_parts,
+                'part_loads': part_loads.astype(int).tolist(),
+                'imbalance': float(part_loads.max() /
+                                   max(part_loads.mean(), 1)),
+                'n_empty_parts': int(np.sum(part_loads <= 0)),
+                'cut_traffic': int(self.get_cut_traffic(parts)),
+                'total_traffic': int(self.total_traffic),
+                'n_cut_conns': n_cut_conns,
+                'part_traffic': traffic}
+
+    def get_plan(self, parts):
+        return {'units': [{'key': unit.key, 'module': unit.module_name,
+                           'n_neurons': unit.n_neurons,
+                           'pinned': unit.pinned,
+                           'partition': int(part)}
+                          for unit, part in zip(self.units, parts)],
+                'cost': self.evaluate(parts)}
+
+
+def print_partition_cost(cost):
+    print "PARTITIONS: %i (%i empty)" % (cost['n_parts'],
+                                         cost['n_empty_parts'])
+    print "LOAD (N_NEURONS): min %i, max %i, imbalance (max/mean) %0.3f" % (
+        min(cost['part_loads']), max(cost['part_loads']), cost['imbalance'])
+    print "CROSS-PARTITION TRAFFIC: %i of %i values/step (%i connections)" % (
+        cost['cut_traffic'], cost['total_traffic'], cost['n_cut_conns'])
+
+
+def write_partition_plan(filename, plan):
+    with open(filename, 'w') as f:
+        json.dump(plan, f, indent=2, sort_keys=True)
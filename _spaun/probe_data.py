@@ -0,0 +1,155 @@
+import zipfile
+import numpy as np
+
+
+class ProbeData(object):
+    """Lazily loaded Spaun probe data (for viewing).
+
+    Probe data is only read (and decompressed) when a probe is first
+    accessed, and only once. Only the rows within the time range
+    [t_start, t_end] are kept, and for .npz files the data past t_end is
+    not decompressed at all. Vocabulary projections of the probe data are
+    also cached.
+
+    Parameters
+    ----------
+    filename: str
+        Probe data filename (.npz, or .h5 for nengo_mpi data).
+    sim_dt: float
+        The simulation timestep (used to generate the time range of .h5
+        probe data).
+    t_start: float, optional
+        Start of the time range to load.
+    t_end: float, optional
+        End of the time range to load.
+    """
+    def __init__(self, filename, sim_dt, t_start=None, t_end=None):
+        self.t_start = -np.inf if t_start is None else t_start
+        self.t_end = np.inf if t_end is None else t_end
+
+        if filename.endswith('.npz'):
+            self.zip_file = zipfile.ZipFile(filename)
+            self.h5_file = None
+            self.data_keys = [name[:-4] for name in self.zip_file.namelist()
+                              if name.endswith('.npy')]
+        elif filename.endswith('.h5'):
+            import h5py
+            self.zip_file = None
+            self.h5_file = h5py.File(filename)
+            self.data_keys = self.h5_file.keys()
+        else:
+            raise RuntimeError('File format not supported.')
+
+        self.data_cache = {}
+        self.vocab_sims_cache = {}
+        self.row_ranges = {}
+
+        if 'trange' in self.data_keys:
+            self.full_trange = self.read_data('trange')
+        else:
+            # H5 file format (nengo_mpi) does not store the time range
+            data_len = self.get_shape(self.data_keys[0])[0]
+            self.full_trange = np.arange(0, data_len * sim_dt, sim_dt)
+        self.trange = self.full_trange[self.get_row_range(None)]
+
+    def keys(self):
+        return self.data_keys
+
+    def __contains__(self, key):
+        return key in self.data_keys
+
+    def __getitem__(self, key):
+        if key not in self.data_cache:
+            shape = self.get_shape(key)
+            if len(shape) > 0 and shape[0] == len(self.get_full_trange(key)):
+                row_range = self.get_row_range(key)
+                self.data_cache[key] = self.read_data(key, row_range.start,
+                                                      row_range.stop)
+            else:
+                # Not time series data (e.g. the stimulus sequence)
+                self.data_cache[key] = self.read_data(key)
+        return self.data_cache[key]
+
+    def get_full_trange(self, key):
+        # Decimated or windowed probes are saved with their own sample times
+        if key is not None and key + '_t' in self.data_keys:
+            if key + '_t' not in self.data_cache:
+                self.data_cache[key + '_t'] = self.read_data(key + '_t')
+            return self.data_cache[key + '_t']
+        return self.full_trange
+
+    def get_row_range(self, key):
+        if key not in self.row_ranges:
+            t = self.get_full_trange(key)
+            self.row_ranges[key] = \
+                slice(np.searchsorted(t, self.t_start, side='left'),
+                      np.searchsorted(t, self.t_end, side='right'))
+        return self.row_ranges[key]
+
+    def get_trange(self, key=None):
+        """Returns the sample times of the (loaded) probe data."""
+        return self.get_full_trange(key)[self.get_row_range(key)]
+
+    def get_vocab_sims(self, key, vocab, projected=False):
+        """Returns the similarity of the probe data to each item in the
+        vocabulary. Projected probe data (see cfg.probe_vocab_project) is
+        already stored as similarities."""
+        if projected:
+            return self[key]
+        if key not in self.vocab_sims_cache:
+            self.vocab_sims_cache[key] = np.dot(self[key], vocab.vectors.T)
+        return self.vocab_sims_cache[key]
+
+    def get_shape(self, key):
+        if self.h5_file is not None:
+            return self.h5_file[key].shape
+
+        npy_file = self.zip_file.open(key + '.npy')
+        shape = self.read_npy_header(npy_file)[0]
+        npy_file.close()
+        return shape
+
+    def read_npy_header(self, npy_file):
+        version = np.lib.format.read_magic(npy_file)
+        if version == (1, 0):
+            return np.lib.format.read_array_header_1_0(npy_file)
+        return np.lib.format.read_array_header_2_0(npy_file)
+
+    def read_data(self, key, start=None, stop=None):
+        if self.h5_file is not None:
+            return self.h5_file[key][start:stop]
+
+        npy_file = self.zip_file.open(key + '.npy')
+        shape, fortran_order, dtype = self.read_npy_header(npy_file)
+
+        if dtype.hasobject or fortran_order or len(shape) == 0:
+            # Not stored as rows of raw data; read the whole array
+            npy_file.close()
+            npy_file = self.zip_file.open(key + '.npy')
+            data = np.lib.format.read_array(npy_file, allow_pickle=True)
+            npy_file.close()
+            return data if len(shape) == 0 else data[start:stop]
+
+        start, stop, _ = slice(start, stop).indices(shape[0])
+        stop = max(start, stop)
+        row_bytes = dtype.itemsize * int(np.prod(shape[1:]))
+
+        # Skip (decompress and discard) the rows before the time range, in
+        # blocks
+        skip_bytes = start * row_bytes
+        while skip_bytes > 0:
+            block = npy_file.read(min(skip_bytes, 2 ** 24))
+            if not block:
+                break
+            skip_bytes -= len(block)
+
+        data = np.frombuffer(npy_file.read((stop - start) * row_bytes),
+                             dtype=dtype)
+        npy_file.close()
+        return data.reshape((stop - start,) + shape[1:])
+
+    def close(self):
+        if self.zip_file is not None:
+            self.zip_file.close()
+        if self.h5_file is not None:
+            self.h5_file.close()
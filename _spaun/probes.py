@@ -7,12 +7,10 @@ from nengo.synapses import Lowpass
 
 from .config import cfg
 from .vocabs import num_sp_strs
-from .vocabs import vis_vocab, pos_vocab, enum_vocab
-from .vocabs import ps_task_vocab, ps_state_vocab, ps_dec_vocab, ps_cmp_vocab
-from .vocabs import mtr_vocab, mtr_disp_vocab, item_vocab, pos1_vocab, vocab
-from .vocabs import mtr_sp_scale_factor
 from .modules.working_memory import WorkingMemoryDummy
 from .modules.transform_system import TransformationSystemDummy
+from .modules.experimenter import get_stim_windows
+from .utils import get_module_obj_map, get_obj_module_name
 
 
 def idstr(p):
@@ -22,6 +20,238 @@ def idstr(p):
         return str(id(p))
 
 
+def setup_probe_sample_every(model, probes):
+    """Sets the sampling period of the given probes using
+    cfg.probe_sample_every (a dict mapping Spaun module names, or 'all', to
+    a sampling period in seconds). Probes are matched to a module by the
+    module that contains the probed object."""
+    if len(cfg.probe_sample_every) <= 0:
+        return
+
+    obj_map = get_module_obj_map(model)
+
+    for probe in probes:
+        sample_every = cfg.probe_sample_every.get('all', None)
+        name = get_obj_module_name(probe, obj_map)
+        if name is not None:
+            sample_every = cfg.probe_sample_every.get(name, sample_every)
+
+        if sample_every is not None:
+            probe.sample_every = sample_every
+
+
+def get_probe_windows():
+    """Returns the probe recording windows, as a list of (t_start, t_end)
+    tuples, from cfg.probe_windows. Each entry of cfg.probe_windows is
+    either a (t_start, t_end) tuple or a stimulus pattern string (see
+    get_stim_windows). An empty list means record everything."""
+    windows = []
+    for window in cfg.probe_windows:
+        if isinstance(window, str):
+            windows.extend(get_stim_windows(window))
+        else:
+            windows.append(tuple(window))
+    return windows
+
+
+def get_window_mask(t, windows):
+    if len(windows) <= 0:
+        return np.ones(len(t), dtype=bool)
+
+    mask = np.zeros(len(t), dtype=bool)
+    for t_start, t_end in windows:
+        mask |= (t >= t_start) & (t < t_end)
+    return mask
+
+
+def get_probe_sample_times(probe, dt, start_ind, n_samples):
+    period = dt if probe.sample_every is None else probe.sample_every
+    return (np.arange(start_ind, start_ind + n_samples) + 1) * period
+
+
+def records_probe_times(probe, windows):
+    # Probes that are not sampled every timestep (or only recorded in some
+    # time windows) are saved with their sample times (as <probe>_t)
+    return probe.sample_every is not None or len(windows) > 0
+
+
+def get_probe_vocab_projs(probes, vocab_dict):
+    """Returns the vocabulary projection matrices (keyed by idstr) of the
+    probes that are recorded as vocabulary similarities instead of vectors
+    (if cfg.probe_vocab_project is set). These are the probes that have a
+    vocabulary (of matching dimensionality) in the vocab_dict."""
+    vocab_projs = {}
+    if not cfg.probe_vocab_project:
+        return vocab_projs
+
+    for probe in probes:
+        key = idstr(probe)
+        if key in vocab_dict and \
+           vocab_dict[key].dimensions == getattr(probe.target, 'size_out',
+                                                 None):
+            vocab_projs[key] = vocab_dict[key].vectors.T
+    return vocab_projs
+
+
+def get_probe_data(sim, probes, windows=[], vocab_projs={}):
+    """Returns the data recorded by the given probes (keyed by idstr),
+    restricted to the given recording windows. Probes with a vocabulary
+    projection (see get_probe_vocab_projs) are projected onto their
+    vocabulary."""
+    probe_data = {}
+    for probe in probes:
+        key = idstr(probe)
+        data = sim.data[probe]
+        if records_probe_times(probe, windows):
+            t = get_probe_sample_times(probe, sim.dt, 0, len(data))
+            mask = get_window_mask(t, windows)
+            data = data[mask]
+            probe_data[key + '_t'] = t[mask]
+        if key in vocab_projs:
+            data = np.dot(data, vocab_projs[key])
+        probe_data[key] = data
+    return probe_data
+
+
+class ProbeDataWriter(object):
+    """Streaming probe data writer.
+
+    Drains the probe data recorded by the simulator (see `drain`) into one
+    append-only raw data file per probe, so that the probe data kept in
+    memory is bounded by the number of steps between drains. When closed,
+    the raw data files are combined into the same compressed .npz format
+    written by run_spaun.py.
+
+    Parameters
+    ----------
+    filename: str
+        Filename of the final (.npz) probe data file.
+    probes: list of nengo.Probe
+        The probes to record.
+    windows: list of tuples, optional
+        (t_start, t_end) time windows to record the probe data in. Probe
+        data outside of these windows is discarded when drained.
+    vocab_projs: dict, optional
+        Vocabulary projection matrices (keyed by idstr) of the probes to
+        record as vocabulary similarities (see get_probe_vocab_projs).
+    """
+    def __init__(self, filename, probes, windows=[], vocab_projs={}):
+        self.filename = filename
+        self.probes = probes
+        self.windows = windows
+        self.vocab_projs = vocab_projs
+        self.chunk_dir = filename[:-4] + '_chunks'
+
+        if not os.path.isdir(self.chunk_dir):
+            os.makedirs(self.chunk_dir)
+
+        self.n_samples = dict([(idstr(probe), 0) for probe in probes])
+        self.n_rows = {}
+        self.shapes = {}
+        self.dtypes = {}
+        self.files = {}
+        for probe in probes:
+            self.add_raw_file(idstr(probe))
+            if records_probe_times(probe, windows):
+                self.add_raw_file(idstr(probe) + '_t', shape=(),
+                                  dtype=np.dtype(np.float64))
+
+    def add_raw_file(self, key, shape=None, dtype=None):
+        self.n_rows[key] = 0
+        if shape is not None:
+            self.shapes[key] = shape
+        if dtype is not None:
+            self.dtypes[key] = dtype
+        self.files[key] = open(os.path.join(self.chunk_dir, key + '.raw'),
+                               'wb')
+
+    def write_raw(self, key, data):
+        self.shapes.setdefault(key, data.shape[1:])
+        self.dtypes.setdefault(key, data.dtype)
+        data.astype(self.dtypes[key]).tofile(self.files[key])
+        self.n_rows[key] += data.shape[0]
+
+    def drain(self, sim):
+        # Note: The probe data is read from (and cleared in) the private
+        #       sim._probe_outputs, a dict of per-sample lists (keyed by
+        #       probe). Supported: the Nengo 2.0 and 2.1 reference
+        #       simulators, where _probe_outputs is sim.model.params.
+        if not hasattr(sim, '_probe_outputs'):
+            raise RuntimeError('Streaming probe data is not supported by ' +
+                               'this simulator.')
+
+        for probe in self.probes:
+            probe_outputs = sim._probe_outputs[probe]
+            if len(probe_outputs) == 0:
+                continue
+
+            key = idstr(probe)
+            data = np.asarray(probe_outputs)
+            if records_probe_times(probe, self.windows):
+                t = get_probe_sample_times(probe, sim.dt,
+                                           self.n_samples[key], len(data))
+                mask = get_window_mask(t, self.windows)
+                self.n_samples[key] += len(data)
+                data = data[mask]
+                self.write_raw(key + '_t', t[mask])
+            if key in self.vocab_projs:
+                data = np.dot(data, self.vocab_projs[key])
+            self.write_raw(key, data)
+
+            # Free the drained probe data
+            del probe_outputs[:]
+
+    def close(self, sim, **extra_data):
+        import zipfile
+
+        self.drain(sim)
+        for f in self.files.values():
+            f.close()
+
+        tmp_filename = self.filename + '.tmp'
+        zip_file = zipfile.ZipFile(tmp_filename, 'w',
+                                   compression=zipfile.ZIP_DEFLATED,
+                                   allowZip64=True)
+
+        # Extra (non-probe) data is small; save it with numpy directly
+        for key in extra_data:
+            npy_filename = os.path.join(self.chunk_dir, key + '.npy')
+            np.save(npy_filename, extra_data[key])
+            zip_file.write(npy_filename, key + '.npy')
+            os.remove(npy_filename)
+
+        # Probe data is copied from the raw data files in blocks, so that
+        # no probe is ever fully loaded into memory
+        for key in sorted(self.files.keys()):
+            raw_filename = os.path.join(self.chunk_dir, key + '.raw')
+            npy_filename = os.path.join(self.chunk_dir, key + '.npy')
+
+            header = {'descr': np.lib.format.dtype_to_descr(
+                          self.dtypes.get(key, np.dtype(np.float64))),
+                      'fortran_order': False,
+                      'shape': (self.n_rows[key],) + self.shapes.get(key,
+                                                                     (0,))}
+            with open(npy_filename, 'wb') as npy_file:
+                np.lib.format.write_array_header_1_0(npy_file, header)
+                with open(raw_filename, 'rb') as raw_file:
+                    while True:
+                        block = raw_file.read(2 ** 24)
+                        if not block:
+                            break
+                        npy_file.write(block)
+
+            zip_file.write(npy_filename, key + '.npy')
+            os.remove(npy_filename)
+            os.remove(raw_filename)
+
+        zip_file.close()
+        os.rmdir(self.chunk_dir)
+
+        if os.name == 'nt' and os.path.exists(self.filename):
+            os.remove(self.filename)
+        os.rename(tmp_filename, self.filename)
+
+
 def add_to_graph_list(graph_list, probes, probes_to_legend=[]):
     new_list = map(idstr, probes)
 
@@ -64,16 +294,29 @@ def add_to_anim_config(anim_config, key, data_func_name, data_func_params,
 def config_and_setup_probes(model):
     version = 4.0
 
-    config_filename = cfg.probe_data_filename[:-4] + '_cfg.npz'
-
     graph_list, vocab_dict, anim_config = setup_probes(model)
+    setup_probe_sample_every(model, model.all_probes)
+    vocab_projs = get_probe_vocab_projs(model.all_probes, vocab_dict)
     config_data = {'sp_dim': cfg.sp_dim, 'graph_list': graph_list,
-                   'vocab_dict': vocab_dict, 'prim_vocab': vocab,
+                   'vocab_dict': vocab_dict,
+                   'prim_vocab': model.vocabs.vocab,
                    'anim_config': anim_config,
+                   'vocab_projected': sorted(vocab_projs.keys()),
                    'dt': cfg.sim_dt, 'version': version}
 
+    model.probe_config = config_data
+    model.probe_vocab_projs = vocab_projs
+    return write_probe_config(model)
+
+
+def write_probe_config(model):
+    """Writes the probe configuration of a model with probes set up (see
+    config_and_setup_probes) for the current cfg.probe_data_filename, and
+    returns the probe vocabulary projections."""
+    config_filename = cfg.probe_data_filename[:-4] + '_cfg.npz'
     np.savez_compressed(os.path.join(cfg.data_dir, config_filename),
-                        **config_data)
+                        **model.probe_config)
+    return model.probe_vocab_projs
 
 
 def setup_probes(model):
@@ -81,6 +324,8 @@ def setup_probes(model):
 
 
 def setup_probes_vis(model):
+    vis_vocab = model.vocabs.vis_vocab
+
     with model:
         p0 = nengo.Probe(model.stim.output)
 
@@ -98,6 +343,21 @@ def setup_probes_vis(model):
 
 
 def setup_probes_generic(model):
+    vocabs = model.vocabs
+    vocab = vocabs.vocab
+    vis_vocab = vocabs.vis_vocab
+    pos_vocab = vocabs.pos_vocab
+    enum_vocab = vocabs.enum_vocab
+    item_vocab = vocabs.item_vocab
+    pos1_vocab = vocabs.pos1_vocab
+    ps_task_vocab = vocabs.ps_task_vocab
+    ps_state_vocab = vocabs.ps_state_vocab
+    ps_dec_vocab = vocabs.ps_dec_vocab
+    ps_cmp_vocab = vocabs.ps_cmp_vocab
+    mtr_vocab = vocabs.mtr_vocab
+    mtr_disp_vocab = vocabs.mtr_disp_vocab
+    mtr_sp_scale_factor = vocabs.mtr_sp_scale_factor
+
     with model:
         model.config[nengo.Probe].synapse = Lowpass(0.005)
 
@@ -0,0 +1,193 @@
+import json
+import timeit
+from contextlib import contextmanager
+
+from nengo.builder import Model
+
+from .utils import get_module_obj_map, get_obj_module_name
+from .utils import spaun_module_names
+
+
+toplevel_name = 'spaun'  # Objects that do not belong to any Spaun module
+
+profile_phases = ['construct', 'connect', 'build', 'solver', 'step']
+
+
+class ModuleTimer(object):
+    """Accumulates the time spent in each (module, phase)."""
+    def __init__(self):
+        self.times = {}
+
+    def add(self, module_name, phase, t):
+        key = (module_name, phase)
+        self.times[key] = self.times.get(key, 0.0) + t
+
+    @contextmanager
+    def time(self, module_name, phase):
+        timestamp = timeit.default_timer()
+        try:
+            yield
+        finally:
+            self.add(module_name, phase, timeit.default_timer() - timestamp)
+
+
+class ProfilingDecoderCache(object):
+    """Decoder cache wrapper that times the decoder solver calls (and the
+    cache lookups) made by the builder, and attributes them to the Spaun
+    module that is being built (see ProfilingModel).
+
+    Note: The builder solves for decoders through the decoder cache for
+          every connection of a seeded model (Spaun is always seeded).
+    """
+    def __init__(self, decoder_cache, model):
+        self.decoder_cache = decoder_cache
+        self.model = model
+
+    def wrap_solver(self, solver_fn):
+        cached_solver = self.decoder_cache.wrap_solver(solver_fn)
+        model = self.model
+
+        def timed_solver(*args, **kwargs):
+            timestamp = timeit.default_timer()
+            try:
+                return cached_solver(*args, **kwargs)
+            finally:
+                model.timer.add(model.build_stack[-1][0], 'solver',
+                                timeit.default_timer() - timestamp)
+        return timed_solver
+
+    def __getattr__(self, name):
+        return getattr(self.decoder_cache, name)
+
+
+class ProfilingModel(Model):
+    """Builder model that attributes the build time (and the solver time) of
+    every object to the Spaun module that it belongs to.
+
+    Build times are exclusive (the time spent building a network does not
+    include the time spent building the objects in it), and include the
+    solver times. The module of every
+    operator added to the model is also recorded (see op_modules), so that
+    the simulation step time can be attributed to the modules (see
+    StepProfiler).
+
+    Parameters
+    ----------
+    spaun_model: nengo.Network
+        The Spaun model that will be built.
+    timer: ModuleTimer
+        Timer to add the build and solver times to.
+    """
+    def __init__(self, spaun_model, timer, *args, **kwargs):
+        self.obj_map = get_module_obj_map(spaun_model)
+        self.timer = timer
+        self.op_modules = []
+        self.build_stack = []
+        super(ProfilingModel, self).__init__(*args, **kwargs)
+        self.decoder_cache = ProfilingDecoderCache(self.decoder_cache, self)
+
+    def attribute_ops(self):
+        module_name = (self.build_stack[-1][0] if len(self.build_stack) > 0
+                       else toplevel_name)
+        n_new_ops = len(self.operators) - len(self.op_modules)
+        self.op_modules.extend([module_name] * n_new_ops)
+
+    def build(self, obj, *args, **kwargs):
+        parent_name = (self.build_stack[-1][0] if len(self.build_stack) > 0
+                       else toplevel_name)
+        module_name = get_obj_module_name(obj, self.obj_map, parent_name)
+
+        self.attribute_ops()
+        # Stack entries: [module name, time spent building child objects]
+        self.build_stack.append([module_name, 0.0])
+        timestamp = timeit.default_timer()
+        try:
+            return super(ProfilingModel, self).build(obj, *args, **kwargs)
+        finally:
+            build_time = timeit.default_timer() - timestamp
+            self.attribute_ops()
+            child_time = self.build_stack.pop()[1]
+            self.timer.add(module_name, 'build', build_time - child_time)
+            if len(self.build_stack) > 0:
+                self.build_stack[-1][1] += build_time
+
+
+class StepProfiler(object):
+    """Attributes the reference simulator step time to the Spaun modules, by
+    timing every operator step function.
+
+    NOTE: Timing every operator slows down the simulation. The step times
+          are best used to compare the modules with each other.
+
+    Parameters
+    ----------
+    sim: nengo.Simulator
+        The reference simulator (built with a ProfilingModel).
+    timer: ModuleTimer
+        Timer to add the step times to.
+    """
+    def __init__(self, sim, timer):
+        self.sim = sim
+        self.timer = timer
+
+        op_inds = dict([(id(op), i)
+                        for i, op in enumerate(sim.model.operators)])
+        self.step_modules = [sim.model.op_modules[op_inds[id(op)]]
+                             for op in sim._step_order]
+        self.install()
+
+    def install(self):
+        # Note: Has to be re-installed if the simulator is reset
+        self.sim._steps = [self.timed_step(step_fn, module_name)
+                           for step_fn, module_name in
+                           zip(self.sim._steps, self.step_modules)]
+
+    def timed_step(self, step_fn, module_name):
+        timer = self.timer
+        default_timer = timeit.default_timer
+
+        def step():
+            timestamp = default_timer()
+            step_fn()
+            timer.add(module_name, 'step', default_timer() - timestamp)
+        return step
+
+
+def get_profile_report(model, timer, n_steps=0):
+    module_names = [toplevel_name] + \
+        [name for name in spaun_module_names if hasattr(model, name)]
+
+    obj_map = get_module_obj_map(model)
+    n_neurons = dict([(name, 0) for name in module_names])
+    for ens in model.all_ensembles:
+        n_neurons[get_obj_module_name(ens, obj_map, toplevel_name)] += \
+            ens.n_neurons
+
+    modules = {}
+    for name in module_names:
+        modules[name] = dict([(phase, timer.times.get((name, phase), 0.0))
+                              for phase in profile_phases])
+        modules[name]['n_neurons'] = n_neurons[name]
+    return {'modules': modules, 'module_order': module_names,
+            'n_steps': n_steps}
+
+
+def print_profile_report(report):
+    n_steps = report['n_steps']
+    row_format = '%-8s %10s %10s %10s %10s %10s %12s %10s'
+    print row_format % ('MODULE', 'N_NEURONS', 'CONSTRUCT', 'CONNECT',
+                        'BUILD', 'SOLVER', 'STEP', 'MS/STEP')
+
+    for name in report['module_order']:
+        module = report['modules'][name]
+        print row_format % (
+            name, module['n_neurons'], '%0.3fs' % module['construct'],
+            '%0.3fs' % module['connect'], '%0.3fs' % module['build'],
+            '%0.3fs' % module['solver'], '%0.3fs' % module['step'],
+            '%0.4f' % (module['step'] * 1000.0 / n_steps) if n_steps > 0
+            else '-')
+
+
+def write_profile_report(filename, report):
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
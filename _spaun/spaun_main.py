@@ -2,7 +2,9 @@ import nengo
 from nengo import spa
 
 from .config import cfg
-from _spaun.modules.experimenter import parse_raw_seq
+from .profiler import ModuleTimer
+from .vocabs import SpaunVocabs
+from _spaun.modules.experimenter import parse_raw_seq, append_raw_seq
 from _spaun.modules import Stimulus, Vision, ProdSys, InfoEnc, InfoDec, Motor
 from _spaun.modules import TrfmSys, Memory, Monitor
 
@@ -21,26 +23,43 @@ from _spaun.modules import TrfmSys, Memory, Monitor
 # - Write display code to automatically capture written digits
 # - Add a way for the command parser to set arbitrary configurations?
 
-def Spaun():
+def Spaun(vocabs=None):
+    # Generate the vocabularies for the current configuration (if not given)
+    if vocabs is None:
+        vocabs = SpaunVocabs()
+
     # Process the raw stimulus provided to spaun
     parse_raw_seq()
 
     model = spa.SPA(label='Spaun', seed=cfg.seed)
+    model.vocabs = vocabs
     with model:
         model.config[nengo.Ensemble].max_rates = cfg.max_rates
         model.config[nengo.Ensemble].neuron_type = cfg.neuron_type
         model.config[nengo.Ensemble].n_neurons = cfg.n_neurons_ens
         model.config[nengo.Connection].synapse = cfg.pstc
 
-        model.stim = Stimulus()
-        model.vis = Vision()
-        model.ps = ProdSys()
-        model.enc = InfoEnc()
-        model.mem = Memory()
-        model.trfm = TrfmSys()
-        model.dec = InfoDec()
-        model.mtr = Motor()
-        model.monitor = Monitor()
+        # Module construction and connection times (see --profile)
+        timer = ModuleTimer()
+
+        with timer.time('stim', 'construct'):
+            model.stim = Stimulus(vocabs)
+        with timer.time('vis', 'construct'):
+            model.vis = Vision(vocabs)
+        with timer.time('ps', 'construct'):
+            model.ps = ProdSys(vocabs)
+        with timer.time('enc', 'construct'):
+            model.enc = InfoEnc(vocabs)
+        with timer.time('mem', 'construct'):
+            model.mem = Memory(vocabs)
+        with timer.time('trfm', 'construct'):
+            model.trfm = TrfmSys(vocabs)
+        with timer.time('dec', 'construct'):
+            model.dec = InfoDec(vocabs)
+        with timer.time('mtr', 'construct'):
+            model.mtr = Motor(vocabs)
+        with timer.time('monitor', 'construct'):
+            model.monitor = Monitor(vocabs)
 
         if hasattr(model, 'vis') and hasattr(model, 'ps') and \
            hasattr(model, 'trfm'):
@@ -94,29 +113,43 @@ def Spaun():
                            fi_action + decode_action + default_action)
 
             actions = spa.Actions(*all_actions)
-            model.bg = spa.BasalGanglia(actions=actions, input_synapse=0.008)
-            model.thal = spa.Thalamus(model.bg, mutual_inhibit=1)
+            with timer.time('bg', 'construct'):
+                model.bg = spa.BasalGanglia(actions=actions,
+                                            input_synapse=0.008)
+            with timer.time('thal', 'construct'):
+                model.thal = spa.Thalamus(model.bg, mutual_inhibit=1)
 
         # ----- Set up connections (and save record of modules) -----
-        if hasattr(model, 'vis'):
-            model.vis.setup_connections(model)
-        if hasattr(model, 'ps'):
-            model.ps.setup_connections(model)
-        if hasattr(model, 'enc'):
-            model.enc.setup_connections(model)
-        if hasattr(model, 'mem'):
-            model.mem.setup_connections(model)
-        if hasattr(model, 'trfm'):
-            model.trfm.setup_connections(model)
-        if hasattr(model, 'dec'):
-            model.dec.setup_connections(model)
-        if hasattr(model, 'mtr'):
-            model.mtr.setup_connections(model)
-        if hasattr(model, 'bg'):
-            pass
-        if hasattr(model, 'thal'):
-            pass
-        if hasattr(model, 'monitor'):
-            model.monitor.setup_connections(model)
+        for name in ['vis', 'ps', 'enc', 'mem', 'trfm', 'dec', 'mtr',
+                     'monitor']:
+            if hasattr(model, name):
+                with timer.time(name, 'connect'):
+                    getattr(model, name).setup_connections(model)
 
+    model.construct_times = timer.times
     return model
+
+
+def reset_stimulus(model):
+    """Re-parses the stimulus (cfg.raw_seq_str) and swaps it into an already
+    constructed Spaun network, so that the network (and its probes) can be
+    reused for another run. Also resets the python state in the network
+    (the arm, and the monitor log)."""
+    parse_raw_seq()
+
+    if hasattr(model, 'stim'):
+        model.stim.set_stim_seq(cfg.stim_seq)
+    if hasattr(model, 'mtr'):
+        model.mtr.reset_arm()
+    if hasattr(model, 'monitor'):
+        model.monitor.reset()
+
+
+def branch_stimulus(model, seq_str):
+    """Appends the stimulus sequence string to the stimulus of a (partially
+    simulated) Spaun network, so that the simulation continues with the
+    appended sequence (see branching.fork_branches)."""
+    append_raw_seq(seq_str)
+
+    if hasattr(model, 'stim'):
+        model.stim.set_stim_seq(cfg.stim_seq)
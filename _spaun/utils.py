@@ -1,10 +1,125 @@
+import gc
+import weakref
 import numpy as np
 
+import nengo
+
+
+# Top-level Spaun modules (in the order that they are created)
+spaun_module_names = ['stim', 'vis', 'ps', 'bg', 'thal', 'enc', 'mem', 'trfm',
+                      'dec', 'mtr', 'monitor']
+
 
 def get_total_n_neurons(model):
     return sum([e.n_neurons for e in model.all_ensembles])
 
 
+def get_module_obj_map(model):
+    # Maps (the id of) every object in each top-level Spaun module, and the
+    # module networks themselves, to the module name
+    obj_map = {}
+    for name in spaun_module_names:
+        if hasattr(model, name):
+            module = getattr(model, name)
+            obj_map[id(module)] = name
+            for obj in (module.all_ensembles + module.all_nodes +
+                        module.all_connections + module.all_networks +
+                        module.all_probes):
+                obj_map[id(obj)] = name
+    return obj_map
+
+
+def get_obj_module_name(obj, obj_map, default=None):
+    # Connections and probes made outside of the Spaun modules (e.g. in
+    # setup_connections) belong to the module that they connect to (or
+    # probe)
+    if isinstance(obj, nengo.base.ObjView):
+        obj = obj.obj
+    if isinstance(obj, nengo.ensemble.Neurons):
+        obj = obj.ensemble
+
+    if id(obj) in obj_map:
+        return obj_map[id(obj)]
+    elif isinstance(obj, nengo.Connection):
+        return get_obj_module_name(
+            obj.post_obj, obj_map,
+            get_obj_module_name(obj.pre_obj, obj_map, default))
+    elif isinstance(obj, nengo.Probe):
+        return get_obj_module_name(obj.target, obj_map, default)
+    return default
+
+
+def get_built_weights(built_conn):
+    """Returns the weights of a built connection (sim.data[conn]). These are
+    the weights (the decoders with the transform folded in) with Nengo 2.1,
+    and the decoders with Nengo 2.0 (None if the connection is not
+    decoded)."""
+    if hasattr(built_conn, 'weights'):
+        return built_conn.weights
+    return built_conn.decoders
+
+
+def free_build_data(sim):
+    """Frees the data that is only needed to build the model (the ensemble
+    and connection eval points, the solver info and the transforms that are
+    folded into the decoders) once the simulator has been built. Returns the
+    number of bytes released. Only the arrays whose last reference is
+    dropped are counted (e.g. transforms that are still used by the built
+    signals are not released).
+
+    NOTE: The freed attributes of sim.data[obj] are set to None.
+    """
+    # Weak references to (and sizes of) the memory blocks of the dropped
+    # arrays, to find out which of them are released
+    dropped = {}
+
+    def drop(value):
+        if isinstance(value, dict):
+            for v in value.values():
+                drop(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                drop(v)
+        elif isinstance(value, np.ndarray):
+            while isinstance(value.base, np.ndarray):
+                value = value.base
+            dropped[id(value)] = (weakref.ref(value), value.nbytes)
+
+    params = sim.model.params
+    for obj in params:
+        if isinstance(obj, nengo.Ensemble):
+            drop(params[obj].eval_points)
+            params[obj] = params[obj]._replace(eval_points=None)
+        elif isinstance(obj, nengo.Connection):
+            built_conn = params[obj]
+            drop([built_conn.eval_points, built_conn.solver_info])
+            # Note: With Nengo 2.0 the transforms are not folded into the
+            #       decoders, they are still used by the built signals (and
+            #       are not released)
+            transform = built_conn.transform
+            if transform is not get_built_weights(built_conn):
+                drop(transform)
+                transform = None
+            params[obj] = built_conn._replace(eval_points=None,
+                                              solver_info={},
+                                              transform=transform)
+    built_conn = transform = None
+
+    # Cached decoders (see SpaunBuildCache) are only used in the build
+    decoder_cache = sim.model.decoder_cache
+    # Note: The decoder cache is wrapped when profiling the build (see
+    #       profiler.ProfilingDecoderCache)
+    decoder_cache = getattr(decoder_cache, 'decoder_cache', decoder_cache)
+    if hasattr(decoder_cache, 'decoders'):
+        drop([decoder_cache.decoders, decoder_cache.ens_params])
+        decoder_cache.decoders = []
+        decoder_cache.ens_params = []
+
+    gc.collect()
+    return sum([n_bytes for ref, n_bytes in dropped.values()
+                if ref() is None])
+
+
 def sum_vocab_vecs(vocab, vocab_strs):
     result = vocab[vocab_strs[0]].copy()
 
@@ -0,0 +1,93 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+import nengo
+from nengo.spa import Vocabulary
+
+from .config import cfg
+
+
+vocab_cache_version = 1
+
+
+def get_vocab_cache_filename(source_files):
+    """Returns the vocabulary cache filename for the current configuration
+    (or None if the vocabulary cache is disabled, see cfg.vocab_cache_dir).
+
+    The cached vocabularies are keyed on the semantic pointer dimension and
+    the seed, and on the state of cfg.rng (that the vocabularies are
+    generated from), the nengo version and the contents of the given
+    source files (the vocabulary definitions)."""
+    if cfg.vocab_cache_dir == '':
+        return None
+
+    key = hashlib.sha1()
+    key.update('%s;%s;%i;%i;%i\n' % (vocab_cache_version, nengo.__version__,
+                                     cfg.sp_dim, cfg.seed,
+                                     cfg.max_enum_list_pos))
+    rng_state = cfg.rng.get_state()
+    key.update(rng_state[1].tostring())
+    key.update('%s' % (rng_state[2:],))
+    for filename in source_files:
+        with open(filename, 'rb') as f:
+            key.update(f.read())
+
+    return os.path.join(cfg.vocab_cache_dir, 'vocabs_d%i_s%i_%s.npz' %
+                        (cfg.sp_dim, cfg.seed, key.hexdigest()[:12]))
+
+
+def save_vocab_cache(filename, vocabs, values):
+    """Writes the given vocabularies (a dict of name -> Vocabulary), values
+    (a dict of name -> JSON serializable value) and the state of cfg.rng to
+    the vocabulary cache file."""
+    rng_state = cfg.rng.get_state()
+    meta = {'values': values, 'rng_state': list(rng_state[2:]),
+            'vocabs': {}}
+
+    data = {'rng_keys': rng_state[1]}
+    for name, vocab in vocabs.items():
+        meta['vocabs'][name] = {'keys': vocab.keys,
+                                'unitary': vocab.unitary,
+                                'dimensions': vocab.dimensions}
+        data[name] = vocab.vectors
+    data['meta'] = np.array(json.dumps(meta))
+
+    cache_dir = os.path.dirname(filename)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    # Write to a process specific temporary file first so that concurrent
+    # runs do not read partial cache files
+    tmp_filename = '%s.%i.tmp' % (filename, os.getpid())
+    with open(tmp_filename, 'wb') as f:
+        np.savez(f, **data)
+    if os.name == 'nt' and os.path.exists(filename):
+        os.remove(filename)
+    os.rename(tmp_filename, filename)
+
+
+def load_vocab_cache(filename):
+    """Reads the vocabularies and values from the vocabulary cache file, and
+    restores the state of cfg.rng (to what it was after the vocabularies
+    were generated). Returns the (vocabs, values) dicts."""
+    data = np.load(filename)
+    meta = json.loads(str(data['meta']))
+
+    vocabs = {}
+    for name, vocab_meta in meta['vocabs'].items():
+        unitary = vocab_meta['unitary']
+        if isinstance(unitary, list):
+            unitary = map(str, unitary)
+        vocab = Vocabulary(vocab_meta['dimensions'], unitary=unitary,
+                           rng=cfg.rng)
+        for key, vector in zip(vocab_meta['keys'], data[name]):
+            vocab.add(str(key), vector)
+        vocabs[str(name)] = vocab
+
+    cfg.rng.set_state(('MT19937', data['rng_keys']) +
+                      tuple(meta['rng_state']))
+    data.close()
+
+    return vocabs, meta['values']
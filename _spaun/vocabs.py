@@ -7,6 +7,8 @@ from ._networks import convert_func_2_diff_func
 
 from .config import cfg
 from .utils import strs_to_inds
+from .vocab_cache import get_vocab_cache_filename
+from .vocab_cache import load_vocab_cache, save_vocab_cache
 
 
 # ############### Semantic pointer (strings) definitions ######################
@@ -49,54 +51,20 @@ vis_sp_strs = list(num_sp_strs)
 vis_sp_strs.extend(misc_vis_sp_strs)
 vis_sp_strs.extend(ps_task_vis_sp_strs)
 
-# --- Position (enumerated) semantic pointers ---
-pos_sp_strs = ['POS%i' % (i + 1) for i in range(cfg.max_enum_list_pos)]
-
 # --- Operations semantic pointers
 ops_sp_strs = ['ADD', 'INC']
 
-# --- Unitary semantic pointers
-unitary_sp_strs = [num_sp_strs[0], pos_sp_strs[0]]
-unitary_sp_strs.extend(ops_sp_strs)
+
+# --- Position (enumerated) semantic pointers ---
+# Note: The number of position semantic pointers depends on the configuration
+#       (cfg.max_enum_list_pos), see SpaunVocabs.pos_sp_strs
+def make_pos_sp_strs(max_enum_list_pos):
+    return ['POS%i' % (i + 1) for i in range(max_enum_list_pos)]
 
 
 # ####################### Vocabulary definitions ##############################
-# --- Primary vocabulary ---
-vocab = Vocabulary(cfg.sp_dim, unitary=unitary_sp_strs, rng=cfg.rng)
-
-# --- Add numerical sp's ---
-vocab.parse('%s+%s' % (ops_sp_strs[0], num_sp_strs[0]))
-add_sp = vocab[ops_sp_strs[0]]
-num_sp = vocab[num_sp_strs[0]].copy()
-for i in range(len(num_sp_strs) - 1):
-    num_sp = num_sp.copy() * add_sp
-    vocab.add(num_sp_strs[i + 1], num_sp)
-
-# --- Add positional sp's ---
-vocab.parse('%s+%s' % (ops_sp_strs[1], pos_sp_strs[0]))
-inc_sp = vocab[ops_sp_strs[1]]
-pos_sp = vocab[pos_sp_strs[0]].copy()
-for i in range(len(pos_sp_strs) - 1):
-    pos_sp = pos_sp.copy() * inc_sp
-    vocab.add(pos_sp_strs[i + 1], pos_sp)
-
-# --- Add other visual sp's ---
-vocab.parse('+'.join(misc_vis_sp_strs))
-vocab.parse('+'.join(ps_task_vis_sp_strs))
-
-# --- Add production system sp's ---
-vocab.parse('+'.join(ps_task_sp_strs))
-vocab.parse('+'.join(ps_state_sp_strs))
-vocab.parse('+'.join(ps_dec_sp_strs))
-vocab.parse('+'.join(misc_ps_sp_strs))
-
-# ####################### Motor vocabularies ##################################
 mtr_filepath = os.path.join('_spaun', 'modules', 'motor')
-mtr_canon_paths = np.load(os.path.join(mtr_filepath, 'canon_paths.npz'))
-mtr_canon_paths_x = mtr_canon_paths['canon_paths_x']
-mtr_canon_paths_y = mtr_canon_paths['canon_paths_y']
-
-cfg.mtr_dim = mtr_canon_paths_x.shape[1] + mtr_canon_paths_y.shape[1]
+mtr_canon_paths_filename = os.path.join(mtr_filepath, 'canon_paths.npz')
 
 
 def make_mtr_sp(path_x, path_y):
@@ -104,47 +72,6 @@ def make_mtr_sp(path_x, path_y):
     path_y = convert_func_2_diff_func(path_y)
     return np.concatenate((path_x, path_y))
 
-mtr_vocab = Vocabulary(cfg.mtr_dim, rng=cfg.rng)
-for i, sp_str in enumerate(num_sp_strs):
-    mtr_sp_vec = make_mtr_sp(mtr_canon_paths_x[i, :], mtr_canon_paths_y[i, :])
-    mtr_vocab.add(sp_str, mtr_sp_vec)
-
-mtr_unk_vocab = Vocabulary(cfg.mtr_dim, rng=cfg.rng)
-mtr_unk_vocab.add(mtr_sp_strs[0], make_mtr_sp(mtr_canon_paths_x[-1, :],
-                                              mtr_canon_paths_y[-1, :]))
-
-mtr_disp_vocab = mtr_vocab.create_subset(num_sp_strs)
-mtr_disp_vocab.readonly = False  # Disable read-only flag for display vocab
-mtr_disp_vocab.add(mtr_sp_strs[0], mtr_unk_vocab[mtr_sp_strs[0]].v)
-
-mtr_sp_scale_factor = float(mtr_canon_paths['size_scaling_factor'])
-
-# ##################### Sub-vocabulary definitions ############################
-vis_vocab = vocab.create_subset(vis_sp_strs)
-vis_vocab_nums_inds = range(len(num_sp_strs))
-vis_vocab_syms_inds = range(len(num_sp_strs), len(vis_sp_strs))
-
-pos_vocab = vocab.create_subset(pos_sp_strs)
-
-item_vocab = vocab.create_subset(num_sp_strs)
-
-ps_task_vocab = vocab.create_subset(ps_task_sp_strs)
-ps_state_vocab = vocab.create_subset(ps_state_sp_strs)
-ps_dec_vocab = vocab.create_subset(ps_dec_sp_strs)
-ps_cmp_vocab = vocab.create_subset(misc_ps_sp_strs)
-
-# ################ Enumerated vocabulary definitions ##########################
-# --- Enumerated vocabulary, enumerates all possible combinations of position
-#     and item vectors (for debug purposes)
-enum_vocab = Vocabulary(cfg.sp_dim, rng=cfg.rng)
-for pos in pos_sp_strs:
-    for num in num_sp_strs:
-        enum_vocab.add('%s*%s' % (pos, num), vocab[pos] * vocab[num])
-
-pos1_vocab = Vocabulary(cfg.sp_dim, rng=cfg.rng)
-for num in num_sp_strs:
-    pos1_vocab.add('%s*%s' % (pos_sp_strs[0], num),
-                   vocab[pos_sp_strs[0]] * vocab[num])
 
 # ############## Semantic pointer lists for signal generation #################
 item_mb_gate_sp_strs = list(num_sp_strs)
@@ -192,13 +119,144 @@ ps_dec_mb_gate_sp_inds = strs_to_inds(ps_dec_mb_gate_sp_strs, vis_sp_strs)
 ps_dec_mb_rst_sp_strs = ['A']
 ps_dec_mb_rst_sp_inds = strs_to_inds(ps_dec_mb_rst_sp_strs, vis_sp_strs)
 
-# Note: sum_vocab_vecs have to be fed through threshold before use.
-dec_out_sr_sp_vecs = vocab.parse('FWD + REV + CNT + DECI').v
-dec_out_copy_draw_sp_vecs = vocab.parse('DECW').v
-dec_out_fr_sp_vecs = vocab.parse('0').v  # TODO: Implement
-
-dec_pos_gate_dec_sp_vecs = vocab.parse('DECW + DECI + FWD + REV').v
-dec_pos_gate_task_sp_vecs = vocab.parse('DEC').v
 
-mtr_init_task_sp_vecs = vocab.parse('DEC').v
-mtr_bypass_task_sp_vecs = vocab.parse('CNT').v
+class SpaunVocabs(object):
+    """The Spaun vocabularies (and the semantic pointer vectors derived from
+    them), generated from the current configuration (cfg.sp_dim,
+    cfg.max_enum_list_pos and cfg.rng).
+
+    A SpaunVocabs object is created for every Spaun model (see Spaun), and
+    passed to the Spaun modules. Changing the configuration and creating a
+    new SpaunVocabs object regenerates the vocabularies (e.g. to run models
+    with different dimensions or seeds in the same process).
+
+    Note: Creating a SpaunVocabs object sets cfg.mtr_dim.
+    """
+    def __init__(self):
+        self.sp_dim = cfg.sp_dim
+        self.pos_sp_strs = make_pos_sp_strs(cfg.max_enum_list_pos)
+        self.unitary_sp_strs = [num_sp_strs[0], self.pos_sp_strs[0]]
+        self.unitary_sp_strs.extend(ops_sp_strs)
+
+        # --- Generate the vocabularies (or load them from the cache) ---
+        cache_filename = get_vocab_cache_filename(
+            [os.path.splitext(__file__)[0] + '.py', mtr_canon_paths_filename])
+        if cache_filename is not None and os.path.exists(cache_filename):
+            vocabs, values = load_vocab_cache(cache_filename)
+        else:
+            vocabs, values = self.make_vocabs()
+            if cache_filename is not None:
+                save_vocab_cache(cache_filename, vocabs, values)
+
+        self.vocab = vocabs['vocab']
+        self.mtr_vocab = vocabs['mtr_vocab']
+        self.mtr_unk_vocab = vocabs['mtr_unk_vocab']
+        self.enum_vocab = vocabs['enum_vocab']
+        self.pos1_vocab = vocabs['pos1_vocab']
+
+        cfg.mtr_dim = values['mtr_dim']
+        self.mtr_sp_scale_factor = values['mtr_sp_scale_factor']
+
+        self.mtr_disp_vocab = self.mtr_vocab.create_subset(num_sp_strs)
+        # Disable read-only flag for display vocab
+        self.mtr_disp_vocab.readonly = False
+        self.mtr_disp_vocab.add(mtr_sp_strs[0],
+                                self.mtr_unk_vocab[mtr_sp_strs[0]].v)
+
+        # ################# Sub-vocabulary definitions #######################
+        self.vis_vocab = self.vocab.create_subset(vis_sp_strs)
+        self.vis_vocab_nums_inds = range(len(num_sp_strs))
+        self.vis_vocab_syms_inds = range(len(num_sp_strs), len(vis_sp_strs))
+
+        self.pos_vocab = self.vocab.create_subset(self.pos_sp_strs)
+
+        self.item_vocab = self.vocab.create_subset(num_sp_strs)
+
+        self.ps_task_vocab = self.vocab.create_subset(ps_task_sp_strs)
+        self.ps_state_vocab = self.vocab.create_subset(ps_state_sp_strs)
+        self.ps_dec_vocab = self.vocab.create_subset(ps_dec_sp_strs)
+        self.ps_cmp_vocab = self.vocab.create_subset(misc_ps_sp_strs)
+
+        # ########### Semantic pointer vectors for signal generation ##########
+        # Note: sum_vocab_vecs have to be fed through threshold before use.
+        self.dec_out_sr_sp_vecs = self.vocab.parse('FWD + REV + CNT + DECI').v
+        self.dec_out_copy_draw_sp_vecs = self.vocab.parse('DECW').v
+        self.dec_out_fr_sp_vecs = self.vocab.parse('0').v  # TODO: Implement
+
+        self.dec_pos_gate_dec_sp_vecs = \
+            self.vocab.parse('DECW + DECI + FWD + REV').v
+        self.dec_pos_gate_task_sp_vecs = self.vocab.parse('DEC').v
+
+        self.mtr_init_task_sp_vecs = self.vocab.parse('DEC').v
+        self.mtr_bypass_task_sp_vecs = self.vocab.parse('CNT').v
+
+    def make_vocabs(self):
+        # --- Primary vocabulary ---
+        vocab = Vocabulary(cfg.sp_dim, unitary=self.unitary_sp_strs,
+                           rng=cfg.rng)
+
+        # --- Add numerical sp's ---
+        vocab.parse('%s+%s' % (ops_sp_strs[0], num_sp_strs[0]))
+        add_sp = vocab[ops_sp_strs[0]]
+        num_sp = vocab[num_sp_strs[0]].copy()
+        for i in range(len(num_sp_strs) - 1):
+            num_sp = num_sp.copy() * add_sp
+            vocab.add(num_sp_strs[i + 1], num_sp)
+
+        # --- Add positional sp's ---
+        vocab.parse('%s+%s' % (ops_sp_strs[1], self.pos_sp_strs[0]))
+        inc_sp = vocab[ops_sp_strs[1]]
+        pos_sp = vocab[self.pos_sp_strs[0]].copy()
+        for i in range(len(self.pos_sp_strs) - 1):
+            pos_sp = pos_sp.copy() * inc_sp
+            vocab.add(self.pos_sp_strs[i + 1], pos_sp)
+
+        # --- Add other visual sp's ---
+        vocab.parse('+'.join(misc_vis_sp_strs))
+        vocab.parse('+'.join(ps_task_vis_sp_strs))
+
+        # --- Add production system sp's ---
+        vocab.parse('+'.join(ps_task_sp_strs))
+        vocab.parse('+'.join(ps_state_sp_strs))
+        vocab.parse('+'.join(ps_dec_sp_strs))
+        vocab.parse('+'.join(misc_ps_sp_strs))
+
+        # --- Motor vocabularies ---
+        mtr_canon_paths = np.load(mtr_canon_paths_filename)
+        mtr_canon_paths_x = mtr_canon_paths['canon_paths_x']
+        mtr_canon_paths_y = mtr_canon_paths['canon_paths_y']
+
+        cfg.mtr_dim = mtr_canon_paths_x.shape[1] + mtr_canon_paths_y.shape[1]
+
+        mtr_vocab = Vocabulary(cfg.mtr_dim, rng=cfg.rng)
+        for i, sp_str in enumerate(num_sp_strs):
+            mtr_sp_vec = make_mtr_sp(mtr_canon_paths_x[i, :],
+                                     mtr_canon_paths_y[i, :])
+            mtr_vocab.add(sp_str, mtr_sp_vec)
+
+        mtr_unk_vocab = Vocabulary(cfg.mtr_dim, rng=cfg.rng)
+        mtr_unk_vocab.add(mtr_sp_strs[0],
+                          make_mtr_sp(mtr_canon_paths_x[-1, :],
+                                      mtr_canon_paths_y[-1, :]))
+
+        mtr_sp_scale_factor = float(mtr_canon_paths['size_scaling_factor'])
+
+        # --- Enumerated vocabularies ---
+        # Enumerated vocabulary, enumerates all possible combinations of
+        # position and item vectors (for debug purposes)
+        enum_vocab = Vocabulary(cfg.sp_dim, rng=cfg.rng)
+        for pos in self.pos_sp_strs:
+            for num in num_sp_strs:
+                enum_vocab.add('%s*%s' % (pos, num), vocab[pos] * vocab[num])
+
+        pos1_vocab = Vocabulary(cfg.sp_dim, rng=cfg.rng)
+        for num in num_sp_strs:
+            pos1_vocab.add('%s*%s' % (self.pos_sp_strs[0], num),
+                           vocab[self.pos_sp_strs[0]] * vocab[num])
+
+        vocabs = {'vocab': vocab, 'mtr_vocab': mtr_vocab,
+                  'mtr_unk_vocab': mtr_unk_vocab, 'enum_vocab': enum_vocab,
+                  'pos1_vocab': pos1_vocab}
+        values = {'mtr_dim': cfg.mtr_dim,
+                  'mtr_sp_scale_factor': mtr_sp_scale_factor}
+        return vocabs, values
@@ -0,0 +1,99 @@
+"""Checks that the vectorized associative memory (cfg.am_vectorized) matches
+the per-item associative memory.
+
+Both associative memories (with a WTA network, a default output vector and
+a cleanup output, as made by cfg.make_assoc_mem) are given the same inputs,
+and the steady state utilities (element utilities, output utilities and
+cleaned output utilities) and outputs of the two implementations are
+compared.
+
+Usage:
+    python benchmarks/check_vec_am.py [--n_items 20] [--tol 0.1]
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(bench_dir))
+
+import nengo  # noqa
+from _spaun._networks import AssociativeMemory  # noqa
+from _spaun._networks import VectorizedAssociativeMemory  # noqa
+
+
+def make_am(am_class, input_vectors, default_vector, n_neurons):
+    am = am_class(input_vectors, n_neurons=n_neurons, threshold=0.3)
+    am.add_wta_network(3.5)
+    am.add_default_output_vector(default_vector)
+    am.add_cleanup_output()
+    return am
+
+
+def run_check(n_items, dim, n_neurons, t_run, seed):
+    rng = np.random.RandomState(seed)
+    input_vectors = rng.randn(n_items, dim)
+    input_vectors /= np.linalg.norm(input_vectors, axis=1)[:, None]
+    default_vector = rng.randn(dim)
+    default_vector /= np.linalg.norm(default_vector)
+
+    # One input per test case: each input vector (scaled), and a blend of
+    # two input vectors
+    test_inputs = [input_vectors[0], 0.6 * input_vectors[1],
+                   0.7 * input_vectors[2] + 0.4 * input_vectors[3]]
+
+    probe_names = ['elem_utilities', 'output_utilities',
+                   'cleaned_output_utilities', 'output']
+    max_errs = dict([(name, 0.0) for name in probe_names])
+    for test_input in test_inputs:
+        with nengo.Network(seed=seed) as model:
+            stim = nengo.Node(output=test_input)
+            probes = {}
+            for key, am_class in [('am', AssociativeMemory),
+                                  ('vec_am', VectorizedAssociativeMemory)]:
+                am = make_am(am_class, input_vectors, default_vector,
+                             n_neurons)
+                nengo.Connection(stim, am.input, synapse=None)
+                probes[key] = dict([(name, nengo.Probe(getattr(am, name),
+                                                       synapse=0.01))
+                                    for name in probe_names])
+
+        sim = nengo.Simulator(model)
+        sim.run(t_run)
+
+        # Steady state (mean over the last 20% of the run)
+        n_steady = int(0.2 * t_run / sim.dt)
+        for name in probe_names:
+            am_data = sim.data[probes['am'][name]][-n_steady:].mean(axis=0)
+            vec_data = \
+                sim.data[probes['vec_am'][name]][-n_steady:].mean(axis=0)
+            max_errs[name] = max(max_errs[name],
+                                 np.max(np.abs(am_data - vec_data)))
+    return max_errs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compares the vectorized and per-item associative ' +
+                    'memories.')
+    parser.add_argument('--n_items', type=int, default=20)
+    parser.add_argument('-d', type=int, default=64)
+    parser.add_argument('--n_neurons', type=int, default=50)
+    parser.add_argument('-t', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--tol', type=float, default=0.1,
+                        help='Maximum absolute difference allowed.')
+    args = parser.parse_args()
+
+    max_errs = run_check(args.n_items, args.d, args.n_neurons, args.t,
+                         args.seed)
+
+    failed = False
+    for name in sorted(max_errs.keys()):
+        ok = max_errs[name] <= args.tol
+        failed = failed or not ok
+        print "%-26s max abs difference: %0.4f  %s" % (
+            name, max_errs[name], 'OK' if ok else 'FAILED')
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,292 @@
+"""Spaun benchmark suite.
+
+Runs the canonical Spaun task sequences at several dimensionalities and
+records the time taken by each phase of a Spaun run, and compares the
+results of two benchmark runs.
+
+Usage:
+    python benchmarks/spaun_bench.py run [-d 64 128 512] [--tasks A0 A3]
+    python benchmarks/spaun_bench.py compare OLD_RESULTS NEW_RESULTS
+
+Each benchmark is run in a fresh python process (so that the import and
+vocabulary generation times, and the peak memory usage, are measured for
+each benchmark on its own).
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(bench_dir)
+
+# ----- Canonical task sequences (see def_seq in run_spaun.py) -----
+task_seqs = {'A0': 'A0[#1]?X',
+             'A1': 'A1[#1]?XXX',
+             'A2': 'A2?XXXXX',
+             'A3': 'A3[123]?XXXX',
+             'A4': 'A4[5][3]?XXXXXX',
+             'A5': 'A5[123]K[3]?X',
+             'A6': 'A6[12][2][82][2][42]?XXXXX',
+             'A7': 'A7[1][2][3][2][3][4][3][4]?XXX'}
+
+# Recorded metrics, and whether a larger value is better (used to flag
+# regressions)
+metrics = [('t_import', False), ('t_vocab', False), ('t_network', False),
+           ('t_build', False), ('t_sim', False), ('sim_throughput', True),
+           ('t_probe_write', False), ('peak_rss_mb', False)]
+
+
+def get_peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return -1
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on OS X, and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak_rss / 1024.0 ** 2
+    return peak_rss / 1024.0
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short',
+                                        'HEAD'], cwd=root_dir).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# ----- Single benchmark (run in its own process) -----
+def run_worker(args):
+    sys.path.insert(0, root_dir)
+
+    result = {'task': args.task, 'seq': task_seqs[args.task], 'dim': args.d,
+              'seed': args.seed, 'backend': 'ref'}
+
+    # The _spaun.modules imports load the vision network data and the image
+    # store, so they are included in the import time
+    timestamp = time.time()
+    import numpy as np
+    import nengo
+    from _spaun.config import cfg
+    from _spaun.vocabs import SpaunVocabs
+    from _spaun.spaun_main import Spaun
+    from _spaun.modules import get_est_runtime
+    from _spaun.probes import config_and_setup_probes, get_probe_data
+    from _spaun.utils import get_total_n_neurons
+    result['t_import'] = time.time() - timestamp
+
+    nengo.rc.set("decoder_cache", "enabled", str(args.enable_cache))
+
+    data_dir = tempfile.mkdtemp(prefix='spaun_bench_')
+    cfg.set_seed(args.seed)
+    cfg.sp_dim = args.d
+    cfg.raw_seq_str = task_seqs[args.task]
+    cfg.data_dir = data_dir
+    cfg.gen_probe_data_filename()
+
+    timestamp = time.time()
+    vocabs = SpaunVocabs()
+    result['t_vocab'] = time.time() - timestamp
+
+    timestamp = time.time()
+    model = Spaun(vocabs)
+    if args.probes:
+        probe_vocab_projs = config_and_setup_probes(model)
+    result['t_network'] = time.time() - timestamp
+    result['n_neurons'] = get_total_n_neurons(model)
+
+    timestamp = time.time()
+    sim = nengo.Simulator(model, dt=cfg.sim_dt)
+    result['t_build'] = time.time() - timestamp
+
+    runtime = get_est_runtime()
+    if args.max_sim_time > 0:
+        runtime = min(runtime, args.max_sim_time)
+    timestamp = time.time()
+    sim.run(runtime)
+    result['t_sim'] = time.time() - timestamp
+    result['sim_runtime'] = runtime
+    result['sim_throughput'] = runtime / result['t_sim']
+
+    if hasattr(model, 'monitor'):
+        model.monitor.close()
+
+    result['t_probe_write'] = 0.0
+    if args.probes:
+        timestamp = time.time()
+        probe_data = {'trange': sim.trange(), 'stim_seq': cfg.stim_seq}
+        probe_data.update(get_probe_data(sim, model.all_probes,
+                                         vocab_projs=probe_vocab_projs))
+        np.savez_compressed(os.path.join(data_dir, cfg.probe_data_filename),
+                            **probe_data)
+        result['t_probe_write'] = time.time() - timestamp
+
+    result['peak_rss_mb'] = get_peak_rss_mb()
+
+    if not args.keep_data:
+        import shutil
+        shutil.rmtree(data_dir)
+
+    # Results are passed back to the benchmark runner on the last line of
+    # the output
+    print '\n' + json.dumps(result)
+
+
+# ----- Benchmark runner -----
+def run_benchmarks(args):
+    results_filename = args.results
+    if results_filename == '':
+        results_filename = os.path.join(bench_dir, 'results',
+                                        'bench_%s_%i.json' %
+                                        (get_commit(), int(time.time())))
+
+    results = {'commit': get_commit(), 'timestamp': time.time(),
+               'host': socket.gethostname(), 'results': []}
+
+    for dim in args.d:
+        for task in args.tasks:
+            print "RUNNING BENCHMARK: %s (%s), d=%i" % (task, task_seqs[task],
+                                                       dim)
+            worker_args = [sys.executable, os.path.abspath(__file__),
+                           'worker', task, '-d', str(dim),
+                           '--seed', str(args.seed),
+                           '--max_sim_time', str(args.max_sim_time)]
+            if args.probes:
+                worker_args.append('--probes')
+            if args.enable_cache:
+                worker_args.append('--enable_cache')
+
+            try:
+                output = subprocess.check_output(worker_args, cwd=root_dir)
+            except subprocess.CalledProcessError as e:
+                print "  FAILED (exit code %i)" % e.returncode
+                continue
+
+            result = json.loads(output.strip().splitlines()[-1])
+            results['results'].append(result)
+            print '  ' + ', '.join(['%s: %0.3f' % (name, result[name])
+                                    for name, _ in metrics])
+
+    results_dir = os.path.dirname(os.path.abspath(results_filename))
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+    with open(results_filename, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print "RESULTS WRITTEN TO: %s" % results_filename
+
+
+# ----- Results comparison -----
+def compare_results(args):
+    with open(args.old_results, 'r') as f:
+        old_results = json.load(f)
+    with open(args.new_results, 'r') as f:
+        new_results = json.load(f)
+
+    print "OLD: %s (%s)" % (old_results['commit'], args.old_results)
+    print "NEW: %s (%s)" % (new_results['commit'], args.new_results)
+
+    old_map = dict([((r['task'], r['dim']), r)
+                    for r in old_results['results']])
+
+    regressions = []
+    row_format = '%-4s %5s %-16s %12s %12s %8s'
+    print row_format % ('TASK', 'DIM', 'METRIC', 'OLD', 'NEW', 'CHANGE')
+    for new in new_results['results']:
+        key = (new['task'], new['dim'])
+        if key not in old_map:
+            continue
+        old = old_map[key]
+
+        for name, higher_is_better in metrics:
+            if name not in old or name not in new or old[name] <= 0:
+                continue
+
+            change = (new[name] - old[name]) / float(old[name])
+            regressed = (change < -args.threshold if higher_is_better else
+                         change > args.threshold)
+            # Ignore changes in the very short phases (timing noise)
+            if name.startswith('t_') and \
+               abs(new[name] - old[name]) < args.min_time:
+                regressed = False
+
+            print (row_format % (key[0], key[1], name, '%0.3f' % old[name],
+                                 '%0.3f' % new[name], '%+0.1f%%' %
+                                 (change * 100)) +
+                   ('  <-- REGRESSION' if regressed else ''))
+            if regressed:
+                regressions.append((key, name))
+
+    print "\n%i REGRESSION(S) (threshold: %0.1f%%)" % (len(regressions),
+                                                       args.threshold * 100)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Spaun benchmark suite.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser(
+        'run', help='Run the benchmarks and write the results to file.')
+    run_parser.add_argument(
+        '-d', type=int, nargs='+', default=[64, 128, 512],
+        help='Semantic pointer dimensionalities to benchmark.')
+    run_parser.add_argument(
+        '--tasks', type=str, nargs='+', default=sorted(task_seqs.keys()),
+        choices=sorted(task_seqs.keys()),
+        help='Tasks to benchmark.')
+    run_parser.add_argument(
+        '--results', type=str, default='',
+        help='Results filename. Defaults to ' +
+             'benchmarks/results/bench_COMMIT_TIMESTAMP.json')
+
+    worker_parser = subparsers.add_parser(
+        'worker', help='Run a single benchmark (used by "run").')
+    worker_parser.add_argument('task', type=str, choices=task_seqs.keys())
+    worker_parser.add_argument('-d', type=int, default=512)
+    worker_parser.add_argument(
+        '--keep_data', action='store_true',
+        help='Supply to keep the benchmark output data.')
+
+    for p in [run_parser, worker_parser]:
+        p.add_argument(
+            '--seed', type=int, default=1,
+            help='Model seed.')
+        p.add_argument(
+            '--max_sim_time', type=float, default=-1,
+            help='Maximum simulation time (in seconds) to run each ' +
+                 'benchmark for.')
+        p.add_argument(
+            '--probes', action='store_true',
+            help='Supply to set up the Spaun probes (and time the probe ' +
+                 'data write).')
+        p.add_argument(
+            '--enable_cache', action='store_true',
+            help='Supply to use the nengo decoder cache.')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare two benchmark results files.')
+    compare_parser.add_argument('old_results', type=str)
+    compare_parser.add_argument('new_results', type=str)
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='Relative change that is flagged as a regression.')
+    compare_parser.add_argument(
+        '--min_time', type=float, default=0.5,
+        help='Minimum change in a phase time (in seconds) that is flagged ' +
+             'as a regression.')
+
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        run_worker(args)
+    elif args.command == 'run':
+        run_benchmarks(args)
+    else:
+        sys.exit(compare_results(args))
@@ -4,6 +4,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from _spaun.animation import ArmAnim, DataFunctions, GeneratorFunctions
+from _spaun.probe_data import ProbeData
 
 supported_data_version = 4
 
@@ -30,23 +31,19 @@ if len(sys.argv) > 2:
 else:
     show_grphs = True
 
-# --------------------- LOAD SIM DATA ---------------------
-gen_trange = False
+# Time range (in seconds) of the probe data to display
+t_start = float(sys.argv[5]) if len(sys.argv) > 5 else None
+t_end = float(sys.argv[6]) if len(sys.argv) > 6 else None
+
+# --------------------- CONFIG FILENAME ---------------------
 if data_filename.endswith('.npz'):
     config_filename = data_filename[:-4] + '_cfg.npz'
-    probe_data = np.load(data_filename)
-
 elif data_filename.endswith('.h5'):
     # H5 file format (nengo_mpi)
     config_dir, filename = os.path.split(data_filename[:-3])
     nameparts = filename.split('+')
     config_filename = os.path.join(config_dir,
                                    '+'.join(nameparts[:2]) + '_cfg.npz')
-
-    import h5py
-    probe_data = h5py.File(data_filename)
-
-    gen_trange = True
 else:
     raise RuntimeError('File format not supported.')
 
@@ -61,13 +58,27 @@ if int(data_version) != int(supported_data_version):
 
 vocab_dict = config_data['vocab_dict'].item()
 
-# --------------------- GENERATE T RANGE ---------------------
-if not gen_trange:
-    trange = probe_data['trange']
-else:
-    sim_dt = config_data['dt']
-    data_len = probe_data[probe_data.keys()[0]].shape[0]
-    trange = np.arange(0, data_len * sim_dt, sim_dt)
+# Probes recorded as vocabulary similarities (instead of vectors)
+vocab_projected = set(config_data['vocab_projected']) \
+    if 'vocab_projected' in config_data.keys() else set()
+
+# --------------------- LOAD SIM DATA ---------------------
+# Note: Probe data is loaded (for the given time range) as it is used
+probe_data = ProbeData(data_filename, config_data['dt'], t_start, t_end)
+trange = probe_data.trange
+
+
+# Resamples probe data onto trange (for the animation)
+def get_full_probe_data(probe):
+    data = probe_data[probe]
+    if probe + '_t' not in probe_data:
+        return data
+
+    probe_t = probe_data.get_trange(probe)
+    data_2d = data.reshape(data.shape[0], -1)
+    full_data = np.array([np.interp(trange, probe_t, data_2d[:, i])
+                          for i in range(data_2d.shape[1])]).T
+    return full_data.reshape((len(trange),) + data.shape[1:])
 
 # --------------------- DISPLAY PROBE DATA ---------------------
 print "\nDISPLAYING PROBE DATA."
@@ -118,6 +129,7 @@ if show_grphs:
                 probe = probe[:-1]
 
             plt.subplot(max_r, 1, r + 1)
+            probe_trange = probe_data.get_trange(probe)
 
             colormap = plt.cm.gist_ncar
 
@@ -127,9 +139,10 @@ if show_grphs:
 
                 plt.gca().set_color_cycle([colormap(i) for i in
                                            np.linspace(0, 0.9, num_classes)])
+                vocab_sims = probe_data.get_vocab_sims(
+                    probe, vocab, probe in vocab_projected)
                 for i in range(num_classes):
-                    plt.plot(trange,
-                             np.dot(probe_data[probe], vocab.vectors.T)[:, i])
+                    plt.plot(probe_trange, vocab_sims[:, i])
                 if disp_legend:
                     plt.legend(vocab.keys, loc='best')
             else:
@@ -140,12 +153,12 @@ if show_grphs:
                                                np.linspace(0, 0.9,
                                                            num_classes)])
                     for i in range(num_classes):
-                        plt.plot(trange, probe_data[probe][:, i])
+                        plt.plot(probe_trange, probe_data[probe][:, i])
                     if disp_legend:
                         plt.legend(map(str, range(num_classes)),
                                    loc='best')
                 else:
-                    plt.plot(trange, probe_data[probe])
+                    plt.plot(probe_trange, probe_data[probe])
 
             plt.xlim([trange[0], trange[-1]])
             plt.ylabel('%i,%i' % (n + 1, r + 1))
@@ -186,7 +199,7 @@ if show_anim:
         data_func_params = {}
         for param_name in config['data_func_params']:
             data_func_params[param_name] = \
-                probe_data[config['data_func_params'][param_name]]
+                get_full_probe_data(config['data_func_params'][param_name])
         data_func = data_func_obj(**data_func_params)
 
         # Add the data function to the function map
@@ -6,6 +6,8 @@ import numpy as np
 
 import nengo
 
+from _spaun.config import cfg
+
 
 # ----- Defaults -----
 def_dim = 512
@@ -53,15 +55,50 @@ parser.add_argument(
     '-t', type=float, default=-1,
     help=('Simulation run time in seconds. If undefined, will be estimated' +
           ' from the stimulus sequence.'))
+parser.add_argument(
+    '--early_stop', action='store_true',
+    help='Supply to end the simulation once Spaun has written every ' +
+         'expected motor response (X), plus a grace period (see ' +
+         '--early_stop_grace). The simulation still ends at the run time ' +
+         '(-t, or the estimated run time) if not all responses are ' +
+         'written. Reference and OpenCL backends only.')
+parser.add_argument(
+    '--early_stop_grace', type=float, default=0.5,
+    help='Simulation time (in seconds) to keep running for once every ' +
+         'expected motor response has been written.')
+parser.add_argument(
+    '--early_stop_steps', type=int, default=100,
+    help='Number of simulation steps between the checks of the written ' +
+         'motor responses.')
 parser.add_argument(
     '-n', type=int, default=1,
     help='Number of batches to run (each batch is a new model).')
+parser.add_argument(
+    '--workers', type=int, default=1,
+    help='Number of worker processes to run the batches on. Each batch is ' +
+         'run in a fresh process with its own seed.')
 parser.add_argument(
     '-s', type=str, default=def_seq,
     help='Stimulus sequence. Use digits to use canonical digits, prepend a ' +
          '"#" to a digit to use handwritten digits, a "[" for the open ' +
          'bracket, a "]" for the close bracket, and a "X" for each expected ' +
          'motor response. e.g. A3[1234]?XXXX or A0[#1]?X')
+parser.add_argument(
+    '--branches', type=str, nargs='+',
+    help='Stimulus sequences to branch the simulation with. The stimulus ' +
+         'sequence (-s) is simulated once (up to --branch_at), and each ' +
+         'branch then continues the simulation in its own process with its ' +
+         'sequence appended to the stimulus sequence. e.g. -s A4[0] ' +
+         '--branches [3]?XXXX [5]?XXXXXX. Reference backend only.')
+parser.add_argument(
+    '--branch_at', type=float, default=-1,
+    help='Simulation time (in seconds) to branch the simulation at. If ' +
+         'undefined, the simulation is branched at the end of the ' +
+         'stimulus sequence (-s).')
+parser.add_argument(
+    '--branch_workers', type=int, default=0,
+    help='Maximum number of branches to simulate at the same time. If ' +
+         'undefined, all branches are simulated at the same time.')
 parser.add_argument(
     '-b', type=str, default='ref',
     help='Backend to use for Spaun. One of ["ref", "ocl", "mpi", "spinn"]')
@@ -71,6 +108,27 @@ parser.add_argument(
 parser.add_argument(
     '--noprobes', action='store_true',
     help='Supply to disable probes.')
+parser.add_argument(
+    '--probe_flush_steps', type=int, default=0,
+    help='Supply to stream the probe data to disk every N simulation ' +
+         'steps (keeps the probe data memory usage bounded). Probes are ' +
+         'not disabled for long runs when streaming.')
+parser.add_argument(
+    '--probe_sample_every', type=float, default=0,
+    help='Supply to record the probe data every N seconds (instead of ' +
+         'every timestep). Use --config "probe_sample_every={...}" to set ' +
+         'the sampling period for each Spaun module.')
+parser.add_argument(
+    '--probe_windows', type=str, nargs='*',
+    help='Time windows to record the probe data in. Each window is either ' +
+         'a time range in seconds (T_START:T_END), or a stimulus pattern ' +
+         '(e.g. "A3" or "?") to record from each presentation of the ' +
+         'pattern to the start of the next task.')
+parser.add_argument(
+    '--probe_vocab_project', action='store_true',
+    help='Supply to record the probes that have a display vocabulary as ' +
+         'their similarity to each vocabulary item (instead of the full ' +
+         'semantic pointer vectors).')
 parser.add_argument(
     '--seed', type=int, default=-1,
     help='Random seed to use.')
@@ -86,9 +144,52 @@ parser.add_argument(
 parser.add_argument(
     '--tag', type=str, default="",
     help='Tag string to apply to probe data file name.')
+parser.add_argument(
+    '--vocab_cache', action='store_true',
+    help='Supply to use the vocabulary cache. Caches the generated ' +
+         'vocabularies keyed on the dimensionality and seed.')
+parser.add_argument(
+    '--vocab_cache_dir', type=str, default='',
+    help='Directory to store the vocabulary cache in. Defaults to ' +
+         'DATA_DIR/vocab_cache.')
+parser.add_argument(
+    '--reuse_network', action='store_true',
+    help='Supply to construct the Spaun network once and reuse it for ' +
+         'every batch run (only the stimulus sequence is regenerated for ' +
+         'each batch). The network keeps the seed of the first batch. Not ' +
+         'supported with multiple workers or the MPI backend.')
 parser.add_argument(
     '--enable_cache', action='store_true',
     help='Supply to use nengo caching system when building the nengo model.')
+parser.add_argument(
+    '--build_cache', action='store_true',
+    help='Supply to use the Spaun built model cache. Caches the built ' +
+         'decoders, encoders, gains and biases keyed on the Spaun ' +
+         'configuration, vocabularies and seed.')
+parser.add_argument(
+    '--build_cache_dir', type=str, default='',
+    help='Directory to store the built model cache in. Defaults to ' +
+         'DATA_DIR/build_cache.')
+parser.add_argument(
+    '--lean_build', action='store_true',
+    help='Supply to free the build-only data (eval points, solver info ' +
+         'and the transforms folded into the decoders) once the model is ' +
+         'built, to reduce the memory used during the simulation.')
+parser.add_argument(
+    '--mem_report', action='store_true',
+    help='Supply to print the memory usage of the built model (by module ' +
+         'and kind of array, and the largest allocations), and write it ' +
+         'to DATA_DIR/PROBE_FILENAME_memory.json.')
+parser.add_argument(
+    '--mem_report_top_n', type=int, default=10,
+    help='Number of largest allocations to list in the memory report.')
+parser.add_argument(
+    '--profile', action='store_true',
+    help='Supply to profile the construction, build (and solver) and ' +
+         'simulation step time of each Spaun module. The profile is ' +
+         'written to DATA_DIR/PROBE_FILENAME_profile.json. Note: ' +
+         'Step times are only profiled for the reference backend, and ' +
+         'profiling the steps slows down the simulation.')
 
 parser.add_argument(
     '--ocl', action='store_true',
@@ -121,6 +222,21 @@ parser.add_argument(
 parser.add_argument(
     '--mpi_p_auto', action='store_true',
     help='MPI Only: Use the automatic partitioner')
+parser.add_argument(
+    '--mpi_p_spaun', action='store_true',
+    help='MPI Only: Use the Spaun module-aware partitioner (balances the ' +
+         'neuron counts of the MPI_P partitions, and minimizes the ' +
+         'dimensionality of the connections between partitions).')
+parser.add_argument(
+    '--mpi_plan', type=str, default='',
+    help='MPI Only: Filename to write the Spaun partition plan (and its ' +
+         'load imbalance and cross-partition traffic) to. Used with ' +
+         '--mpi_p_spaun.')
+parser.add_argument(
+    '--mpi_plan_only', action='store_true',
+    help='Supply to only compute (and write) the Spaun partition plan ' +
+         '(for MPI_P partitions), without building the model. Does not ' +
+         'require nengo_mpi.')
 parser.add_argument(
     '--mpi_compress_save', action='store_true',
     help='Supply to compress the saved net file with gzip.')
@@ -149,41 +265,65 @@ parser.add_argument(
     '--debug', action='store_true',
     help='Supply to output debug stuff.')
 
-args = parser.parse_args()
 
-# ----- Nengo RC Cache settings -----
-# Disable cache unless seed is set (i.e. seed > 0) or if the '--enable_cache'
-# option is given
-if args.seed > 0 or args.enable_cache:
-    print "USING CACHE"
-    nengo.rc.set("decoder_cache", "enabled", "True")
-else:
-    print "NOT USING CACHE"
-    nengo.rc.set("decoder_cache", "enabled", "False")
+def setup_env(args):
+    # ----- Nengo RC Cache settings -----
+    # Disable cache unless seed is set (i.e. seed > 0) or if the
+    # '--enable_cache' option is given
+    if args.seed > 0 or args.enable_cache:
+        print "USING CACHE"
+        nengo.rc.set("decoder_cache", "enabled", "True")
+    else:
+        print "NOT USING CACHE"
+        nengo.rc.set("decoder_cache", "enabled", "False")
 
-# ----- Backend Configurations -----
-from _spaun.config import cfg
+    # ----- Backend Configurations -----
+    cfg.backend = args.b
+    if args.ocl:
+        cfg.backend = 'ocl'
+    if args.mpi:
+        cfg.backend = 'mpi'
+    if args.spinn:
+        cfg.backend = 'spinn'
+
+    print "BACKEND: %s" % cfg.backend.upper()
+
+
+def append_to_file(filename, data_str):
+    # Write the whole record with a single append so that concurrent batch
+    # runs do not interleave their entries
+    with open(filename, 'a') as f:
+        f.write(data_str)
 
-cfg.backend = args.b
-if args.ocl:
-    cfg.backend = 'ocl'
-if args.mpi:
-    cfg.backend = 'mpi'
-if args.spinn:
-    cfg.backend = 'spinn'
 
-print "BACKEND: %s" % cfg.backend.upper()
+def write_mpi_partition_plan(model, args):
+    from _spaun.mpi_partitioner import SpaunPartitioner
+    from _spaun.mpi_partitioner import print_partition_cost
+    from _spaun.mpi_partitioner import write_partition_plan
+
+    spaun_partitioner = SpaunPartitioner(model, args.mpi_p)
+    mpi_parts = spaun_partitioner.partition()
+    mpi_plan = spaun_partitioner.get_plan(mpi_parts)
+    print_partition_cost(mpi_plan['cost'])
+
+    if args.mpi_plan != '':
+        write_partition_plan(args.mpi_plan, mpi_plan)
+        print "PARTITION PLAN WRITTEN TO: %s" % args.mpi_plan
+    return spaun_partitioner, mpi_parts
+
 
 # ----- Batch runs -----
-for n in range(args.n):
+# Spaun network reused across (serial) batch runs (see --reuse_network)
+spaun_network_cache = {}
+
+
+def run_batch(n, seed, args):
     print ("\n======================== RUN %i OF %i ========================" %
            (n + 1, args.n))
 
     # ----- Seeeeeeeed -----
-    if args.seed < 0:
-        seed = int(time.time())
-    else:
-        seed = args.seed
+    if seed is None:
+        seed = int(time.time()) if args.seed < 0 else args.seed
 
     cfg.set_seed(seed)
     print "MODEL SEED: %i" % cfg.seed
@@ -192,6 +332,18 @@ for n in range(args.n):
     cfg.sp_dim = args.d
     cfg.raw_seq_str = args.s
     cfg.data_dir = args.data_dir
+    if args.vocab_cache:
+        cfg.vocab_cache_dir = args.vocab_cache_dir
+        if cfg.vocab_cache_dir == '':
+            cfg.vocab_cache_dir = os.path.join(cfg.data_dir, 'vocab_cache')
+    if args.probe_vocab_project:
+        cfg.probe_vocab_project = True
+    if args.probe_sample_every > 0:
+        cfg.probe_sample_every = {'all': args.probe_sample_every}
+    if args.probe_windows is not None:
+        cfg.probe_windows = [tuple(map(float, window.split(':')))
+                             if ':' in window else window
+                             for window in args.probe_windows]
 
     # Parse --config options
     if args.config is not None:
@@ -203,6 +355,12 @@ for n in range(args.n):
             cfg_value = cfg_opts[1]
             setattr(cfg, cfg_param, eval(cfg_value))
 
+    # Batches run in parallel with a fixed seed would otherwise share the same
+    # output filenames
+    tag = args.tag
+    if args.workers > 1 and args.seed > 0:
+        tag = '_'.join(filter(None, [args.tag, 'b%i' % n]))
+
     if cfg.use_mpi:
         sys.path.append('C:\\Users\\xchoo\\GitHub\\nengo_mpi')
 
@@ -210,9 +368,9 @@ for n in range(args.n):
         mpi_savename = '.'.join(mpi_save[:-1])
         mpi_saveext = mpi_save[-1]
 
-        cfg.gen_probe_data_filename(mpi_savename, suffix=args.tag)
+        cfg.gen_probe_data_filename(mpi_savename, suffix=tag)
     else:
-        cfg.gen_probe_data_filename(suffix=args.tag)
+        cfg.gen_probe_data_filename(suffix=tag)
 
     make_probes = not args.noprobes
 
@@ -226,13 +384,38 @@ for n in range(args.n):
     print "RAW STIM SEQ: %s" % (str(cfg.raw_seq_str))
 
     # ----- Spaun imports -----
-    from _spaun.utils import get_total_n_neurons
-    from _spaun.probes import idstr, config_and_setup_probes
-    from _spaun.spaun_main import Spaun
-    from _spaun.modules import get_est_runtime
+    from _spaun.utils import get_total_n_neurons, free_build_data
+    from _spaun.probes import config_and_setup_probes, write_probe_config
+    from _spaun.probes import ProbeDataWriter
+    from _spaun.probes import get_probe_data, get_probe_windows
+    from _spaun.spaun_main import Spaun, reset_stimulus, branch_stimulus
+    from _spaun.modules import get_est_runtime, get_seq_end_time, EarlyStop
+    from _spaun.vocabs import SpaunVocabs
 
     # ----- Spaun proper -----
-    model = Spaun()
+    if args.reuse_network and 'model' in spaun_network_cache:
+        model = spaun_network_cache['model']
+        reset_stimulus(model)
+        model.construct_times = {}
+        print "REUSING SPAUN NETWORK - NETWORK SEED: %i" % model.seed
+    elif args.mpi_plan_only:
+        # The partition plan only needs the network structure, so the model
+        # is constructed with the reference backend stimulus and monitor
+        # nodes (which do not need nengo_mpi)
+        backend = cfg.backend
+        cfg.backend = 'ref'
+        model = Spaun(SpaunVocabs())
+        cfg.backend = backend
+    else:
+        # Vocabularies are generated for every run (from the current
+        # configuration), the reused network keeps its vocabularies
+        model = Spaun(SpaunVocabs())
+        if args.reuse_network:
+            spaun_network_cache['model'] = model
+
+    if args.mpi_plan_only:
+        write_mpi_partition_plan(model, args)
+        sys.exit()
 
     # ----- Display stimulus seq -----
     print "PROCESSED RAW STIM SEQ: %s" % (str(cfg.raw_seq))
@@ -243,14 +426,19 @@ for n in range(args.n):
     runtime = args.t if args.t > 0 else get_est_runtime()
 
     # ----- Set up probes -----
-    if runtime > max_probe_time:
+    if runtime > max_probe_time and args.probe_flush_steps <= 0:
         print (">>> !!! WARNING !!! EST RUNTIME > %0.2fs - DISABLING PROBES" %
                max_probe_time)
         make_probes = False
 
+    probe_vocab_projs = {}
     if make_probes:
         print "PROBE FILENAME: %s" % cfg.probe_data_filename
-        config_and_setup_probes(model)
+        if hasattr(model, 'probe_config'):
+            # Probes were already set up on a reused network
+            probe_vocab_projs = write_probe_config(model)
+        else:
+            probe_vocab_projs = config_and_setup_probes(model)
 
     # ----- Neuron count debug -----
     print "MODEL N_NEURONS:  %i" % (get_total_n_neurons(model))
@@ -277,6 +465,34 @@ for n in range(args.n):
     print "START BUILD"
     timestamp = time.time()
 
+    builder_model = None
+    if args.build_cache and (cfg.use_ref or cfg.use_opencl):
+        from _spaun.build_cache import SpaunBuildCache
+
+        build_cache_dir = args.build_cache_dir
+        if build_cache_dir == '':
+            build_cache_dir = os.path.join(cfg.data_dir, 'build_cache')
+        build_cache = SpaunBuildCache(build_cache_dir, model)
+        print "BUILD CACHE: %s (%s)" % (
+            build_cache.fingerprint,
+            'HIT' if build_cache.load() else 'MISS')
+        builder_model = build_cache.make_builder_model(cfg.sim_dt)
+
+    profile_timer = None
+    if args.profile and (cfg.use_ref or cfg.use_opencl):
+        from _spaun.profiler import ModuleTimer, ProfilingModel
+
+        profile_timer = ModuleTimer()
+        profile_timer.times.update(model.construct_times)
+        if builder_model is not None:
+            builder_model = build_cache.make_builder_model(
+                cfg.sim_dt, ProfilingModel, model, profile_timer)
+        else:
+            builder_model = ProfilingModel(
+                model, profile_timer, dt=cfg.sim_dt,
+                label='Spaun, dt=%f' % cfg.sim_dt,
+                decoder_cache=nengo.cache.get_default_decoder_cache())
+
     if args.nengo_gui:
         print "STARTING NENGO_GUI"
         import nengo_gui
@@ -308,8 +524,13 @@ for n in range(args.n):
             print "USING DEVICES:"
             print '  ' + '\n  '.join(map(str, pltf.get_devices()))
         sim = nengo_ocl.Simulator(model, dt=cfg.sim_dt, context=ctx,
+                                  model=builder_model,
                                   profiling=args.ocl_profile)
     elif cfg.use_mpi:
+        if args.mpi_p_spaun:
+            spaun_partitioner, mpi_parts = \
+                write_mpi_partition_plan(model, args)
+
         import nengo_mpi
 
         mpi_savefile = \
@@ -327,22 +548,112 @@ for n in range(args.n):
             sim = nengo_mpi.Simulator(model, dt=cfg.sim_dt,
                                       assignments=assignments,
                                       save_file=mpi_savefile)
+        elif args.mpi_p_spaun:
+            assignments = spaun_partitioner.get_assignments(mpi_parts)
+            sim = nengo_mpi.Simulator(model, dt=cfg.sim_dt,
+                                      assignments=assignments,
+                                      save_file=mpi_savefile)
         else:
             partitioner = nengo_mpi.Partitioner(args.mpi_p)
             sim = nengo_mpi.Simulator(model, dt=cfg.sim_dt,
                                       partitioner=partitioner,
                                       save_file=mpi_savefile)
     else:
-        sim = nengo.Simulator(model, dt=cfg.sim_dt)
+        sim = nengo.Simulator(model, dt=cfg.sim_dt, model=builder_model)
+
+    if args.build_cache and builder_model is not None:
+        build_cache.save(sim)
+
+    if args.lean_build and (cfg.use_ref or cfg.use_opencl):
+        print "LEAN BUILD: freed %s B of build data" % (
+            "{:,}".format(free_build_data(sim)))
 
     t_build = time.time() - timestamp
     timestamp = time.time()
     print "BUILD FINISHED - build time: %fs" % t_build
 
     # ----- Spaun simulation run -----
+    probe_writer = None
+    if profile_timer is not None and cfg.use_ref:
+        from _spaun.profiler import StepProfiler
+        StepProfiler(sim, profile_timer)
+
+    # ----- Simulate the shared stimulus sequence, and branch -----
+    branch_ind = None
+    if args.branches is not None:
+        from _spaun.branching import fork_branches
+
+        if not cfg.use_ref:
+            raise RuntimeError('Branching the simulation is only supported ' +
+                               'with the reference backend.')
+        t_branch = args.branch_at if args.branch_at >= 0 else \
+            get_seq_end_time()
+        if t_branch > get_seq_end_time() + 1e-9:
+            raise ValueError('Branch time (%fs) is past the end of the ' %
+                             t_branch + 'stimulus sequence (%fs).' %
+                             get_seq_end_time())
+
+        print "START SHARED SIM - branch time: %f" % t_branch
+        sim.run_steps(int(np.round(t_branch / cfg.sim_dt)))
+        if hasattr(model, 'monitor'):
+            model.monitor.monitor_data.flush()
+
+        print "BRANCHING %i SIMULATIONS" % len(args.branches)
+        branch_ind = fork_branches(len(args.branches), args.branch_workers)
+        if branch_ind is None:
+            # Every branch is simulated (and has its data written) by its
+            # own process
+            if hasattr(model, 'monitor'):
+                model.monitor.close()
+            sim.close()
+            print "FINISHED %i BRANCHES - wall time: %fs" % (
+                len(args.branches), time.time() - timestamp)
+            return
+
+        # The output filenames of a branch are made from its full stimulus
+        # sequence (and its index for repeated branches)
+        branch_stimulus(model, args.branches[branch_ind])
+        if args.branches.count(args.branches[branch_ind]) > 1:
+            tag = '_'.join(filter(None, [tag, 'br%i' % branch_ind]))
+        cfg.gen_probe_data_filename(suffix=tag)
+        if hasattr(model, 'monitor'):
+            model.monitor.branch()
+        runtime = args.t if args.t > 0 else get_est_runtime()
+
+        print "BRANCH %i: %s" % (branch_ind, args.branches[branch_ind])
+        print "STIMULUS SEQ: %s" % (str(cfg.stim_seq))
+
     if cfg.use_opencl or cfg.use_ref:
         print "START SIM - est_runtime: %f" % runtime
-        sim.run(runtime)
+        step_chunks = []
+        if make_probes and args.probe_flush_steps > 0:
+            probe_writer = ProbeDataWriter(
+                os.path.join(cfg.data_dir, cfg.probe_data_filename),
+                model.all_probes, get_probe_windows(), probe_vocab_projs)
+            step_chunks.append(args.probe_flush_steps)
+
+        early_stop = None
+        if args.early_stop:
+            if hasattr(model, 'monitor'):
+                early_stop = EarlyStop(model.monitor, args.early_stop_grace)
+                step_chunks.append(args.early_stop_steps)
+            else:
+                print ">>> !!! WARNING !!! NO MONITOR - EARLY STOP DISABLED"
+
+        n_steps = int(np.round(runtime / cfg.sim_dt))
+        if len(step_chunks) > 0:
+            while sim.n_steps < n_steps:
+                sim.run_steps(min(min(step_chunks), n_steps - sim.n_steps))
+                if probe_writer is not None:
+                    probe_writer.drain(sim)
+                if early_stop is not None and \
+                   early_stop.done(sim.n_steps * cfg.sim_dt):
+                    print "EARLY STOP - all %i responses written at %fs" % (
+                        early_stop.n_expected, early_stop.t_responded)
+                    break
+            runtime = sim.n_steps * cfg.sim_dt
+        else:
+            sim.run_steps(n_steps - sim.n_steps)
 
         # Close output logging file
         if hasattr(model, 'monitor'):
@@ -376,24 +687,31 @@ for n in range(args.n):
             print "UPLOAD '%s' to MPI cluster to run" % mpi_savefile
         t_simrun = -1
 
-    # ----- Generate debug printouts -----
-    n_bytes_ev = 0
-    n_bytes_gain = 0
-    n_bytes_bias = 0
-    n_ens = 0
-    for ens in sim.model.toplevel.all_ensembles:
-        n_bytes_ev += sim.model.params[ens].eval_points.nbytes
-        n_bytes_gain += sim.model.params[ens].gain.nbytes
-        n_bytes_bias += sim.model.params[ens].bias.nbytes
-        n_ens += 1
-
-    print "## DEBUG: num bytes used for eval points: %s B" % (
-        "{:,}".format(n_bytes_ev))
-    print "## DEBUG: num bytes used for gains: %s B" % (
-        "{:,}".format(n_bytes_gain))
-    print "## DEBUG: num bytes used for biases: %s B" % (
-        "{:,}".format(n_bytes_bias))
-    print "## DEBUG: num ensembles: %s" % n_ens
+    # ----- Memory usage report -----
+    if args.mem_report and (cfg.use_opencl or cfg.use_ref):
+        from _spaun.memory_report import MemoryReport
+
+        mem_report = MemoryReport(model, sim)
+        mem_report.print_report(args.mem_report_top_n)
+        mem_report_filename = os.path.join(
+            cfg.data_dir, cfg.probe_data_filename[:-4] + '_memory.json')
+        mem_report.write_report(mem_report_filename, args.mem_report_top_n)
+        print "MEMORY REPORT WRITTEN TO: %s" % mem_report_filename
+        mem_report = None
+
+    # ----- Write module profile -----
+    if profile_timer is not None:
+        from _spaun.profiler import get_profile_report
+        from _spaun.profiler import print_profile_report, write_profile_report
+
+        profile_report = get_profile_report(
+            model, profile_timer, sim.n_steps if cfg.use_ref else 0)
+        profile_filename = os.path.join(
+            cfg.data_dir, cfg.probe_data_filename[:-4] + '_profile.json')
+        print "------ MODULE PROFILE ------"
+        print_profile_report(profile_report)
+        write_profile_report(profile_filename, profile_report)
+        print "PROFILE WRITTEN TO: %s" % profile_filename
 
     # ----- Close simulator -----
     if hasattr(sim, 'close'):
@@ -403,13 +721,23 @@ for n in range(args.n):
     if make_probes and not cfg.use_mpi:
         print "WRITING PROBE DATA TO FILE"
 
-        probe_data = {'trange': sim.trange(), 'stim_seq': cfg.stim_seq}
-        for probe in sim.data.keys():
-            if isinstance(probe, nengo.Probe):
-                probe_data[idstr(probe)] = sim.data[probe]
-        np.savez_compressed(os.path.join(cfg.data_dir,
-                                         cfg.probe_data_filename),
-                            **probe_data)
+        if probe_writer is not None:
+            probe_writer.close(sim, trange=sim.trange(),
+                               stim_seq=cfg.stim_seq)
+        else:
+            probe_data = {'trange': sim.trange(), 'stim_seq': cfg.stim_seq}
+            probe_data.update(get_probe_data(sim, model.all_probes,
+                                             get_probe_windows(),
+                                             probe_vocab_projs))
+            # Write to a temporary file first so that the probe data file
+            # only appears once it is complete
+            probe_filename = os.path.join(cfg.data_dir,
+                                          cfg.probe_data_filename)
+            with open(probe_filename + '.tmp', 'wb') as f:
+                np.savez_compressed(f, **probe_data)
+            if os.name == 'nt' and os.path.exists(probe_filename):
+                os.remove(probe_filename)
+            os.rename(probe_filename + '.tmp', probe_filename)
 
         if args.showgrph or args.showanim:
             subprocess_call_list = ["python",
@@ -432,19 +760,58 @@ for n in range(args.n):
 
     # ----- Write runtime data -----
     runtime_filename = os.path.join(cfg.data_dir, 'runtimes.txt')
-    rt_file = open(runtime_filename, 'a')
-    rt_file.write('# ---------- TIMESTAMP: %i -----------\n' % timestamp)
-    rt_file.write('Backend: %s | Num neurons: %i | Tag: %s | Seed: %i\n' %
-                  (cfg.backend, get_total_n_neurons(model), args.tag,
-                   cfg.seed))
+    rt_str = '# ---------- TIMESTAMP: %i -----------\n' % timestamp
+    rt_str += ('Backend: %s | Num neurons: %i | Tag: %s | Seed: %i\n' %
+               (cfg.backend, get_total_n_neurons(model), tag, cfg.seed))
     if args.config is not None:
-        rt_file.write('Config options: %s\n' % (str(args.config)))
-    rt_file.write('Build time: %fs | Model sim time: %fs | ' % (t_build,
-                                                                runtime))
-    rt_file.write('Sim wall time: %fs\n' % (t_simrun))
-    rt_file.close()
+        rt_str += 'Config options: %s\n' % (str(args.config))
+    rt_str += 'Build time: %fs | Model sim time: %fs | ' % (t_build, runtime)
+    rt_str += 'Sim wall time: %fs\n' % (t_simrun)
+    append_to_file(runtime_filename, rt_str)
 
     # ----- Cleanup -----
     model = None
     sim = None
     probe_data = None
+
+    if branch_ind is not None:
+        from _spaun.branching import exit_branch
+        exit_branch()
+
+
+def run_batch_worker(batch_args):
+    return run_batch(*batch_args)
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if args.nengo_gui:
+            raise RuntimeError('Cannot use nengo_gui with multiple workers.')
+        if args.reuse_network:
+            raise RuntimeError('Cannot reuse the Spaun network with ' +
+                               'multiple workers.')
+        if args.branches is not None:
+            raise RuntimeError('Cannot branch the simulation with ' +
+                               'multiple workers.')
+
+        import multiprocessing
+
+        # Each batch gets its own seed (offset from the start time when no
+        # seed is given) and is run in a fresh worker process so that it
+        # uses its own cfg instance.
+        base_seed = int(time.time())
+        batch_args = [(n, base_seed + n if args.seed < 0 else args.seed, args)
+                      for n in range(args.n)]
+
+        print "RUNNING %i BATCHES ON %i WORKERS" % (args.n, args.workers)
+        pool = multiprocessing.Pool(args.workers, initializer=setup_env,
+                                    initargs=(args,), maxtasksperchild=1)
+        pool.map(run_batch_worker, batch_args, chunksize=1)
+        pool.close()
+        pool.join()
+    else:
+        setup_env(args)
+        for n in range(args.n):
+            run_batch(n, None, args)